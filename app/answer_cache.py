@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from itertools import count
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+import numpy as np
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _CachedAnswer:
+    __slots__ = ("key", "vector", "answer", "results", "expires_at")
+
+    def __init__(self, key, vector, answer, results, expires_at):
+        self.key = key
+        self.vector = vector
+        self.answer = answer
+        self.results = results
+        self.expires_at = expires_at
+
+
+class _Bucket:
+    """Answers sharing one (course_id, mode) key, with their vectors stacked for lookup"""
+
+    def __init__(self):
+        self.entries: Dict[int, _CachedAnswer] = {}
+        self._ids: List[int] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def add(self, entry_id: int, entry: _CachedAnswer):
+        self.entries[entry_id] = entry
+        self._matrix = None
+
+    def remove(self, entry_id: int):
+        del self.entries[entry_id]
+        self._matrix = None
+
+    def matrix(self) -> Tuple[List[int], np.ndarray]:
+        if self._matrix is None:
+            self._ids = list(self.entries)
+            self._matrix = np.stack([self.entries[i].vector for i in self._ids])
+        return self._ids, self._matrix
+
+
+class SemanticAnswerCache:
+    """LRU + TTL cache of first-turn answers, matched by query-embedding similarity.
+
+    Answers are bucketed by ``(course_id, retrieval mode)``; a question hits
+    when its cosine similarity to an earlier question in the same bucket is
+    at least ``threshold``. ``invalidate(course_id)`` drops that course's
+    answers plus the unscoped ones (which may cite it), and ``invalidate()``
+    drops everything. Safe to share across threads.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._ids = count()
+        self._lru: "OrderedDict[int, _CachedAnswer]" = OrderedDict()
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _remove(self, entry_id: int):
+        entry = self._lru.pop(entry_id)
+        bucket = self._buckets[entry.key]
+        bucket.remove(entry_id)
+        if not bucket.entries:
+            del self._buckets[entry.key]
+
+    def get(self, key: Hashable, vector: Sequence[float]) -> Optional[Tuple[str, List[Tuple[Any, float]], float]]:
+        """(answer, retrieval results, similarity) of the closest cached question, or None"""
+        query = self._normalize(vector)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                ids, matrix = bucket.matrix()
+                similarities = matrix @ query
+                best = int(np.argmax(similarities))
+                entry_id, similarity = ids[best], float(similarities[best])
+                if similarity >= self.threshold:
+                    entry = bucket.entries[entry_id]
+                    if entry.expires_at > time.monotonic():
+                        self._lru.move_to_end(entry_id)
+                        self.hits += 1
+                        return entry.answer, entry.results, similarity
+                    self._remove(entry_id)
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, vector: Sequence[float], answer: str, results: List[Tuple[Any, float]]):
+        entry = _CachedAnswer(key, self._normalize(vector), answer, results, time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            entry_id = next(self._ids)
+            self._lru[entry_id] = entry
+            self._buckets.setdefault(key, _Bucket()).add(entry_id, entry)
+            while len(self._lru) > self.max_entries:
+                self._remove(next(iter(self._lru)))
+
+    def invalidate(self, course_id: Any = None):
+        """Forget answers about a reindexed course, or every answer when course_id is None"""
+        with self._lock:
+            if course_id is None:
+                doomed = list(self._lru)
+            else:
+                doomed = [i for i, entry in self._lru.items() if entry.key[0] in (course_id, None)]
+            for entry_id in doomed:
+                self._remove(entry_id)
+            self.invalidated += len(doomed)
+        if doomed:
+            logger.info(f"Answer cache: dropped {len(doomed)} answer(s) for course {course_id}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "invalidated": self.invalidated,
+            }
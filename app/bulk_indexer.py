@@ -0,0 +1,192 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import List
+import numpy as np
+import multiprocessing
+import logging
+import os
+import time
+
+from .embedding_cache import content_key
+
+logger = logging.getLogger(__name__)
+
+# Embedding model loaded once per worker process by _init_worker
+_worker_embeddings = None
+
+
+def _init_worker(settings):
+    global _worker_embeddings
+
+    # Parallelism comes from the pool; keep each worker to one intra-op thread
+    os.environ["OMP_NUM_THREADS"] = "1"
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    from .embeddings_service import build_base_embeddings
+    _worker_embeddings, _ = build_base_embeddings(settings)
+
+
+def _embed_into_shared_memory(shm_name: str, texts: List[str], dim: int) -> int:
+    """Embed texts and write the float32 rows straight into the parent's buffer"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        rows = np.ndarray((len(texts), dim), dtype=np.float32, buffer=shm.buf)
+        rows[:] = np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float32)
+        del rows
+    finally:
+        shm.close()
+    return len(texts)
+
+
+class BulkIndexer:
+    """Embeds chunk batches across a process pool and pipelines vector store upserts.
+
+    Chunks already in the on-disk embedding cache are upserted straight away.
+    The rest are sharded into batches; each worker writes its vectors into a
+    shared-memory block, and the parent upserts finished batches while the
+    remaining ones are still being embedded.
+    """
+
+    def __init__(self, settings, upsert, embeddings, dim: int, workers: int = 0, batch_size: int = 64):
+        self.settings = settings
+        # upsert(docs, vectors): writes to the vector store and the lexical index
+        self.upsert = upsert
+        self.embeddings = embeddings
+        self.dim = dim
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def index_documents(self, docs: List) -> dict:
+        start = time.perf_counter()
+        texts = [doc.page_content for doc in docs]
+        vectors = np.empty((len(docs), self.dim), dtype=np.float32)
+
+        disk_cache = getattr(self.embeddings, "disk_cache", None)
+        keys = None
+        missing = list(range(len(docs)))
+        if disk_cache is not None:
+            keys = [content_key(self.embeddings.model_name, text) for text in texts]
+            missing = []
+            for i, vector in enumerate(disk_cache.get_many(keys)):
+                if vector is None:
+                    missing.append(i)
+                else:
+                    vectors[i] = vector
+
+        missing_set = set(missing)
+        cached = [i for i in range(len(docs)) if i not in missing_set]
+        for offset in range(0, len(cached), self.batch_size):
+            self._upsert(docs, vectors, cached[offset:offset + self.batch_size])
+
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        workers = min(self.workers, len(batches))
+        if batches:
+            self._embed_batches(texts, vectors, batches, workers, docs, keys, disk_cache)
+            if disk_cache is not None:
+                disk_cache.flush()
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "chunks": len(docs),
+            "cached": len(cached),
+            "embedded": len(missing),
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "chunks_per_second": round(len(docs) / elapsed, 1) if elapsed else 0.0,
+        }
+        logger.info(f"Bulk indexing finished: {stats}")
+        return stats
+
+    def _embed_batches(self, texts, vectors, batches, workers, docs, keys, disk_cache):
+        # spawn, not fork: forking after torch has started its thread pool can hang
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.settings,),
+        )
+        pending = {}
+        remaining = iter(batches)
+
+        def submit(batch):
+            shm = shared_memory.SharedMemory(create=True, size=len(batch) * self.dim * 4)
+            future = pool.submit(
+                _embed_into_shared_memory, shm.name, [texts[i] for i in batch], self.dim
+            )
+            pending[future] = (batch, shm)
+
+        try:
+            # Keep two batches queued per worker so nobody idles during upserts
+            for batch in remaining:
+                submit(batch)
+                if len(pending) >= workers * 2:
+                    break
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch, shm = pending.pop(future)
+                    try:
+                        future.result()
+                        rows = np.ndarray((len(batch), self.dim), dtype=np.float32, buffer=shm.buf)
+                        vectors[batch] = rows
+                        del rows
+                    finally:
+                        shm.close()
+                        shm.unlink()
+
+                    next_batch = next(remaining, None)
+                    if next_batch is not None:
+                        submit(next_batch)
+
+                    if disk_cache is not None:
+                        disk_cache.put_many([keys[i] for i in batch], vectors[batch])
+                    self._upsert(docs, vectors, batch)
+        finally:
+            for _, shm in pending.values():
+                shm.close()
+                shm.unlink()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _upsert(self, docs, vectors, rows: List[int]):
+        if not rows:
+            return
+        self.upsert([docs[i] for i in rows], vectors[rows])
+
+
+if __name__ == "__main__":
+    # python -m app.bulk_indexer [courses.json]  (against the configured qdrant_url)
+    import json
+    import sys
+
+    from .config import get_settings
+    from .embeddings_service import EMBEDDING_DIM, EmbeddingsService
+    from .vector_store import create_vector_store
+
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    vector_store = create_vector_store(settings, EMBEDDING_DIM)
+    snapshotter = None
+    if vector_store.is_local:
+        # An in-memory store only outlives this process through its snapshot
+        if not settings.snapshot_dir:
+            sys.exit("Refusing to index into an in-memory store with no snapshot_dir: "
+                     "the vectors would be lost on exit. Set QDRANT_URL or SNAPSHOT_DIR.")
+        from .snapshot import CollectionSnapshotter
+
+        snapshotter = CollectionSnapshotter(vector_store, settings.snapshot_dir)
+        snapshotter.restore()
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "data/courses.json"
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    courses = data["courses"] if isinstance(data, dict) else data
+
+    service = EmbeddingsService(settings, vector_store=vector_store)
+    print(service.index_courses_bulk(courses))
+    if snapshotter is not None:
+        snapshotter.save_if_changed()
@@ -0,0 +1,53 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from typing import Any, Dict, List
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SampledPromptTracer(BaseCallbackHandler):
+    """Logs rendered prompts, completions and LLM latency for a sample of chat turns.
+
+    The opt-in replacement for ``verbose=True`` chains: ``callbacks()`` picks
+    the turn once (so a traced turn shows all of its LLM calls) and returns an
+    empty list for the rest, which costs nothing on the untraced path.
+    """
+
+    # Logging only: no need for langchain to hop to an executor thread
+    run_inline = True
+
+    def __init__(self, sample_rate: float = 0.0, max_chars: int = 2000):
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+        self._starts: Dict[Any, float] = {}
+
+    def callbacks(self) -> List[BaseCallbackHandler]:
+        """Callbacks for one chat turn: [self] for sampled turns, else []"""
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return [self]
+        return []
+
+    def _clip(self, text: str) -> str:
+        return text if len(text) <= self.max_chars else text[:self.max_chars] + f"... [{len(text)} chars]"
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+        for batch in messages:
+            prompt = "\n".join(f"{m.type}: {m.content}" for m in batch)
+            logger.info(f"LLM prompt ({run_id}):\n{self._clip(prompt)}")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+        for prompt in prompts:
+            logger.info(f"LLM prompt ({run_id}):\n{self._clip(prompt)}")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        elapsed = (time.perf_counter() - self._starts.pop(run_id, time.perf_counter())) * 1000
+        text = "".join(g.text for generations in response.generations for g in generations)
+        logger.info(f"LLM output ({run_id}, {elapsed:.0f}ms):\n{self._clip(text)}")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+        logger.warning(f"LLM call {run_id} failed: {error}")
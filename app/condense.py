@@ -0,0 +1,69 @@
+import re
+
+# Words that only make sense with the earlier turns in view
+_REFERENCE_WORDS = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their",
+    "he", "him", "his", "she", "her", "there",
+    "above", "previous", "earlier", "former", "latter", "same",
+    "else", "again", "instead", "also", "too",
+}
+# "this course" names the course the chat is scoped to, not an earlier turn
+_DEMONSTRATIVES = {"this", "that", "these", "those"}
+_SCOPE_NOUNS = {
+    "course", "courses", "class", "program", "bootcamp", "tutorial", "module",
+    "track", "series", "platform", "site", "website",
+}
+# "is there a certificate?", "there are three projects": existential, not a place
+_BE_FORMS = {"is", "are", "was", "were", "be", "been", "isn't", "aren't", "wasn't", "weren't"}
+# Openers that continue the previous question ("and the next lesson?", "what about...")
+_CONTINUATION_RE = re.compile(r"^(and|but|or|so|also|then|more|what about|how about|why|why not|really)\b")
+_WORD_RE = re.compile(r"[a-z']+")
+# A name or technical token ("RxJS", "Python", "Node.js", "C++", "ES6"); capitals
+# only count after the first word, which is capitalized anyway
+_NAME_RE = re.compile(r"^\W*[A-Z]")
+_TECH_TERM_RE = re.compile(r"\d|\w[+#]|\w\.\w")
+
+
+def _names_term(message: str) -> bool:
+    """Whether a message names something concrete enough to retrieve on its own"""
+    tokens = message.split()
+    return any(_TECH_TERM_RE.search(token) for token in tokens) or any(
+        _NAME_RE.match(token) and token.strip("?!.,") not in ("I", "I'm", "I've", "I'd", "I'll")
+        for token in tokens[1:]
+    )
+
+
+def is_follow_up(message: str, min_words: int = 4) -> bool:
+    """Cheap guess whether a message depends on the conversation so far.
+
+    Short fragments without a named term, continuation openers and
+    back-references ("it", "that lesson", "the previous one") count as
+    follow-ups; anything else is taken as a self-contained question and
+    retrieved as is.
+    """
+    text = message.strip().lower()
+    words = _WORD_RE.findall(text)
+    if len(words) < min_words and not _names_term(message):
+        return True
+    if _CONTINUATION_RE.match(text):
+        return True
+    for i, word in enumerate(words):
+        if word not in _REFERENCE_WORDS:
+            continue
+        before = words[i - 1] if i > 0 else ""
+        after = words[i + 1] if i + 1 < len(words) else ""
+        if word in _DEMONSTRATIVES and after in _SCOPE_NOUNS:
+            continue
+        if word == "there" and (before in _BE_FORMS or after in _BE_FORMS):
+            continue
+        return True
+    return False
+
+
+def should_condense(mode: str, message: str, has_history: bool) -> bool:
+    """Whether a turn needs the question-rewriting LLM call under condense_mode"""
+    if not has_history or mode == "never":
+        return False
+    if mode == "always":
+        return True
+    return is_follow_up(message)
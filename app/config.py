@@ -7,23 +7,91 @@ class Settings(BaseSettings):
     perplexity_api_key: str = ""
     
     # Vector Database - IN MEMORY MODE
+    vector_backend: str = "qdrant"  # "qdrant" or "numpy" (in-process index)
     qdrant_url: str = ":memory:"  # Changed from localhost
     qdrant_api_key: str = ""
     collection_name: str = "elearning_courses"
+    qdrant_prefer_grpc: bool = False
+    qdrant_grpc_port: int = 6334
+    qdrant_timeout_seconds: int = 10
+    qdrant_pool_size: int = 20
+
+    # Snapshots of the in-memory collection ("" disables; interval 0 = shutdown only)
+    snapshot_dir: str = ".cache/snapshots"
+    snapshot_interval_seconds: int = 300
     
     # Models
     embedding_model: str = "text-embedding-3-small"
     llm_model: str = "llama-3.1-sonar-small-128k-online"
     llm_provider: str = "perplexity"
+    # LLM calls: in-flight cap per provider (0 = unbounded) and a per-call
+    # timeout covering queueing plus the request (answered with 504)
+    llm_max_concurrency: int = 8
+    llm_timeout_seconds: float = 30.0
     
     # Server
     backend_port: int = 8000
     frontend_url: str = "http://localhost:4200"
     
+    # Blue/green reindex: source courses, and old collection versions kept after a swap
+    courses_file: str = "data/courses.json"
+    reindex_keep_versions: int = 1
+
+    # Streaming ingest (/api/index-courses): chunks per embedding call and upsert
+    ingest_batch_size: int = 256
+
+    # Bulk indexing (process pool). 0 workers = one per CPU core.
+    bulk_index_workers: int = 0
+    bulk_index_batch_size: int = 64
+
     # RAG Settings
     chunk_size: int = 1000
     chunk_overlap: int = 200
     top_k_results: int = 5
+    # "dense" (vectors only) or "hybrid" (BM25 + vectors, reciprocal-rank fused).
+    # Requests opt into hybrid per call; in hybrid each side contributes this
+    # many candidates and scores are RRF scores instead of cosine similarities.
+    retrieval_mode: str = "dense"
+    hybrid_candidates: int = 20
+    # Log one structured JSON record per chat turn (question, hits, timings)
+    rag_debug: bool = False
+    # Fraction of chat turns whose rendered prompts and LLM outputs are logged
+    rag_trace_sample_rate: float = 0.0
+    # Follow-up rewriting before retrieval: "always", "auto" (only when the
+    # message looks like a follow-up) or "never". condense_llm_model picks a
+    # smaller model of the same provider for it ("" = llm_model).
+    condense_mode: str = "auto"
+    condense_llm_model: str = ""
+
+    # Embedding backend: "torch" (sentence-transformers) or "onnx" (ONNX Runtime)
+    embedding_backend: str = "torch"
+    onnx_model_dir: str = ".cache/onnx"
+    onnx_quantize: bool = True
+
+    # Embedding cache (content-addressed, on disk). 0 disables it. One process
+    # per directory: a second one (e.g. a CLI next to the server) runs without it.
+    embedding_cache_dir: str = ".cache/embeddings"
+    embedding_cache_max_entries: int = 100_000
+
+    # Query embedding cache (in-process LRU + TTL). 0 disables it.
+    query_cache_max_entries: int = 2048
+    query_cache_ttl_seconds: int = 3600
+
+    # Semantic answer cache for first-turn chat questions, per course. A cached
+    # answer is reused when the new question's embedding has at least this
+    # cosine similarity to the cached one. 0 entries disables it.
+    answer_cache_max_entries: int = 1000
+    answer_cache_ttl_seconds: int = 3600
+    answer_cache_threshold: float = 0.95
+
+    # Course-scoped chunk cache (whole courses in memory, LRU). 0 MB disables it;
+    # courses with more chunks than the limit always go to the vector store.
+    course_cache_max_mb: int = 64
+    course_cache_max_chunks: int = 200
+
+    # Query embedding micro-batching for concurrent requests
+    embed_batch_max_size: int = 32
+    embed_batch_max_wait_ms: float = 5.0
     
     model_config = {
         "env_file": ".env",
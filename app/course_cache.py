@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from langchain_core.documents import Document
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import logging
+import threading
+
+from .vector_store import payload_to_document
+
+logger = logging.getLogger(__name__)
+
+# Rough per-chunk overhead of a Document and its metadata, on top of the text
+_DOC_OVERHEAD_BYTES = 600
+
+
+class _CachedCourse:
+    def __init__(self, docs: List[Document], vectors: np.ndarray):
+        self.docs = docs
+        self.vectors = vectors
+        self.nbytes = vectors.nbytes + sum(len(d.page_content) + _DOC_OVERHEAD_BYTES for d in docs)
+
+
+class CourseChunkCache:
+    """All chunks and vectors of recently used courses, ranked in-process.
+
+    An LRU keyed by course_id and bounded by an estimate of its memory use.
+    Courses with more than ``max_chunks`` chunks are not cached (remembered as
+    too large until their next reindex), so callers fall back to the vector
+    store for them. A per-course generation counter keeps a load that raced
+    with a reindex from caching stale chunks.
+    """
+
+    def __init__(self, vector_store, max_bytes: int, max_chunks: int = 200):
+        self.vector_store = vector_store
+        self.max_bytes = max_bytes
+        self.max_chunks = max_chunks
+        self._lock = threading.Lock()
+        self._courses: "OrderedDict[Any, _CachedCourse]" = OrderedDict()
+        self._too_large = set()
+        self._generation: Dict[Any, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def invalidate(self, course_id: Any = None):
+        """Drop one course (after it was reindexed), or everything when course_id is None"""
+        with self._lock:
+            if course_id is None:
+                for cached_id in list(self._generation):
+                    self._generation[cached_id] += 1
+                self._courses.clear()
+                self._too_large.clear()
+                self._bytes = 0
+                return
+            self._generation[course_id] = self._generation.get(course_id, 0) + 1
+            self._too_large.discard(course_id)
+            cached = self._courses.pop(course_id, None)
+            if cached is not None:
+                self._bytes -= cached.nbytes
+
+    def _get(self, course_id: Any) -> Optional[_CachedCourse]:
+        with self._lock:
+            cached = self._courses.get(course_id)
+            if cached is not None:
+                self._courses.move_to_end(course_id)
+                self.hits += 1
+                return cached
+            if course_id in self._too_large:
+                self.bypassed += 1
+                return None
+            self.misses += 1
+            generation = self._generation.get(course_id, 0)
+
+        cached = self._load(course_id)
+        with self._lock:
+            if self._generation.get(course_id, 0) != generation:
+                return cached  # reindexed meanwhile: serve this once, don't keep it
+            if cached is None:
+                self._too_large.add(course_id)
+                return None
+            if cached.nbytes > self.max_bytes:
+                return cached
+            old = self._courses.pop(course_id, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._courses[course_id] = cached
+            self._bytes += cached.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._courses.popitem(last=False)
+                self._bytes -= evicted.nbytes
+            return cached
+
+    def _load(self, course_id: Any) -> Optional[_CachedCourse]:
+        filters = {"course_id": course_id}
+        if self.vector_store.count(filters) > self.max_chunks:
+            return None
+        docs, vectors = [], []
+        for record in self.vector_store.iter_points(with_vectors=True, filters=filters):
+            docs.append(payload_to_document(record.payload, record.id))
+            vectors.append(record.vector)
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(docs), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return _CachedCourse(docs, matrix / np.where(norms == 0, 1, norms))
+
+    def search(self, course_id: Any, vector: Sequence[float], top_k: int) -> Optional[List[Tuple[Document, float]]]:
+        """Cosine top-k within one course, or None if the caller should use the vector store"""
+        cached = self._get(course_id)
+        if cached is None:
+            return None
+        if not cached.docs:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = cached.vectors @ query
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(cached.docs[i], float(scores[i])) for i in top]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "courses": len(self._courses),
+                "megabytes": round(self._bytes / 2**20, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed_large": self.bypassed,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
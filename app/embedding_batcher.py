@@ -0,0 +1,87 @@
+from langchain_core.embeddings import Embeddings
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent query embeddings into batched forward passes.
+
+    Callers await ``embed(text)``. A single worker task collects requests for
+    up to ``max_wait_ms`` (or until ``max_batch_size`` are queued), embeds them
+    in one call on a dedicated executor thread, and resolves each caller's
+    future with its own vector.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed-batcher")
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, text: str) -> List[float]:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await self._loop.run_in_executor(
+                    self._executor, self.embeddings.embed_documents, texts
+                )
+            except Exception as e:
+                logger.error(f"Batched embedding of {len(texts)} queries failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(texts)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,335 @@
+from langchain_core.embeddings import Embeddings
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Sequence
+import numpy as np
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so cosmetic edits don't change the cache key"""
+    return " ".join(text.split())
+
+
+class EmbeddingCacheLocked(RuntimeError):
+    """Another process has the cache directory open"""
+
+
+def content_key(model_name: str, text: str) -> str:
+    """Content address of a chunk: hash of model name + normalized text"""
+    payload = f"{model_name}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class DiskEmbeddingCache:
+    """Size-bounded embedding store: a memory-mapped float32 matrix plus a key index.
+
+    Row ``slot`` of ``vectors.f32`` holds the vector for the key mapped to that
+    slot in ``index.json``. When the cache is full the least recently used key
+    is evicted and its slot is reused.
+
+    New assignments are appended to ``index.log`` on flush, so a flush costs
+    as much as the keys it adds. The log is folded into ``index.json`` once it
+    grows as long as the index, and on close.
+
+    Slots are assigned in memory, so one directory serves one process: the
+    constructor takes an exclusive lock on it (released on close) and raises
+    EmbeddingCacheLocked if another process holds it.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    INDEX_FILE = "index.json"
+    JOURNAL_FILE = "index.log"
+    LOCK_FILE = "lock"
+
+    def __init__(self, directory: str, dim: int, max_entries: int):
+        self.directory = Path(directory)
+        self.dim = dim
+        self.capacity = max_entries
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._pending: List[str] = []  # journal lines not yet appended
+        self._journal_entries = 0
+        self._generation = 0  # bumped per compaction; a journal only applies to its own
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = self._acquire_directory_lock()
+        vectors_path = self.directory / self.VECTORS_FILE
+        index_path = self.directory / self.INDEX_FILE
+        journal_path = self.directory / self.JOURNAL_FILE
+        expected_bytes = self.capacity * self.dim * 4
+
+        index = None
+        if index_path.exists() and vectors_path.exists():
+            try:
+                with open(index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Embedding cache index unreadable, starting fresh: {e}")
+
+        reusable = (
+            index is not None
+            and index.get("dim") == self.dim
+            and index.get("capacity") == self.capacity
+            and vectors_path.stat().st_size == expected_bytes
+        )
+
+        if reusable:
+            self._slots = OrderedDict((key, slot) for key, slot in index["entries"])
+            self._generation = index.get("generation", 0)
+            self._replay_journal(journal_path)
+            mode = "r+"
+        else:
+            mode = "w+"
+
+        self._vectors = np.memmap(
+            vectors_path, dtype=np.float32, mode=mode, shape=(self.capacity, self.dim)
+        )
+        if not reusable:
+            self._compact()  # an index on disk from the start, so the journal can apply
+        logger.info(
+            f"Embedding cache at {self.directory}: {len(self._slots)}/{self.capacity} entries"
+        )
+
+    def _acquire_directory_lock(self):
+        lock_file = open(self.directory / self.LOCK_FILE, "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            raise EmbeddingCacheLocked(f"Embedding cache {self.directory} is in use by another process")
+        return lock_file
+
+    def _replay_journal(self, journal_path: Path):
+        if not journal_path.exists():
+            return
+        owners = {slot: key for key, slot in self._slots.items()}
+        with open(journal_path, "r", encoding="utf-8") as f:
+            if f.readline().strip() != f"# generation {self._generation}":
+                return  # left behind by an interrupted compaction; the index has it
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2 or not parts[1].isdigit() or int(parts[1]) >= self.capacity:
+                    continue  # torn last line of an interrupted append
+                key, slot = parts[0], int(parts[1])
+                evicted = owners.get(slot)
+                if evicted is not None and evicted != key:
+                    self._slots.pop(evicted, None)
+                previous = self._slots.pop(key, None)
+                if previous is not None and previous != slot:
+                    owners.pop(previous, None)
+                self._slots[key] = slot
+                owners[slot] = key
+                self._journal_entries += 1
+
+    def __len__(self):
+        return len(self._slots)
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        results = []
+        with self._lock:
+            for key in keys:
+                slot = self._slots.get(key)
+                if slot is None:
+                    results.append(None)
+                    continue
+                self._slots.move_to_end(key)
+                results.append(np.array(self._vectors[slot]))
+        return results
+
+    def put_many(self, keys: Sequence[str], vectors: Sequence[Sequence[float]]):
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                slot = self._slots.get(key)
+                if slot is not None:
+                    self._slots.move_to_end(key)
+                elif len(self._slots) < self.capacity:
+                    slot = len(self._slots)
+                    self._slots[key] = slot
+                else:
+                    _, slot = self._slots.popitem(last=False)
+                    self._slots[key] = slot
+                self._vectors[slot] = np.asarray(vector, dtype=np.float32)
+                self._pending.append(f"{key} {slot}\n")
+            self._dirty = True
+
+    def flush(self):
+        """Persist vectors and append new key assignments to the journal"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._vectors.flush()
+            with open(self.directory / self.JOURNAL_FILE, "a", encoding="utf-8") as f:
+                if f.tell() == 0:
+                    f.write(f"# generation {self._generation}\n")
+                f.writelines(self._pending)
+            self._journal_entries += len(self._pending)
+            self._pending = []
+            self._dirty = False
+            # Amortized: the rewrite costs O(index), paid once per index-length of appends
+            if self._journal_entries >= max(len(self._slots), 1024):
+                self._compact()
+
+    def close(self):
+        """Flush, fold the journal into the index (also records LRU order), release the directory"""
+        self.flush()
+        with self._lock:
+            self._compact()
+            if self._lock_file is not None:
+                self._lock_file.close()  # closing the handle drops the lock
+                self._lock_file = None
+
+    def _compact(self):
+        """Rewrite the index (atomic replace), then drop the journal it absorbed"""
+        self._generation += 1
+        index = {
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "generation": self._generation,
+            "entries": list(self._slots.items()),
+        }
+        index_path = self.directory / self.INDEX_FILE
+        tmp_path = index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+        (self.directory / self.JOURNAL_FILE).unlink(missing_ok=True)
+        self._journal_entries = 0
+
+
+class QueryEmbeddingCache:
+    """In-process LRU + TTL cache of query vectors, safe to share across threads"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, query: str) -> tuple:
+        # bge-small-en-v1.5 uses an uncased tokenizer, so case is safe to fold
+        return model_name, normalize_text(query).lower()
+
+    def get(self, key: tuple) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, vector: List[float]):
+        with self._lock:
+            self._entries[key] = (vector, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only runs the model on chunks it hasn't seen"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        disk_cache: Optional[DiskEmbeddingCache] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None,
+        batcher=None,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.disk_cache = disk_cache
+        self.query_cache = query_cache
+        self.batcher = batcher
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.disk_cache is None:
+            return self.embeddings.embed_documents(texts)
+
+        keys = [content_key(self.model_name, text) for text in texts]
+        vectors = self.disk_cache.get_many(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            fresh = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.disk_cache.put_many([keys[i] for i in missing], fresh)
+            self.disk_cache.flush()
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+
+        logger.info(
+            f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} embedded"
+        )
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+    def close(self):
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.query_cache is None:
+            return self.embeddings.embed_query(text)
+
+        key = self.query_cache.make_key(self.model_name, text)
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.query_cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = None
+        if self.query_cache is not None:
+            key = self.query_cache.make_key(self.model_name, text)
+            vector = self.query_cache.get(key)
+            if vector is not None:
+                return vector
+
+        if self.batcher is not None:
+            vector = await self.batcher.embed(text)
+        else:
+            loop = asyncio.get_running_loop()
+            vector = await loop.run_in_executor(None, self.embeddings.embed_query, text)
+
+        if key is not None:
+            self.query_cache.put(key, vector)
+        return vector
@@ -1,74 +1,134 @@
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Qdrant
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PayloadSchemaType
-from typing import List
+from langchain_core.documents import Document
+from typing import Any, Dict, List, Optional
+import asyncio
 import logging
 
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import CachedEmbeddings, DiskEmbeddingCache, EmbeddingCacheLocked, QueryEmbeddingCache
+from .course_cache import CourseChunkCache
+from .manifest import CourseManifest
+from .lexical_index import BM25Index, reciprocal_rank_fusion, rrf_scores
+from .vector_store import METADATA_KEY, VectorStoreGateway, create_vector_store, payload_to_document
+
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+EMBEDDING_DIM = 384
+
+
+def build_base_embeddings(settings):
+    """Return (embeddings, cache key) for the configured embedding backend"""
+    backend = settings.embedding_backend.lower()
+
+    if backend == "onnx":
+        from .onnx_embeddings import OnnxEmbeddings
+
+        quantize = settings.onnx_quantize
+        embeddings = OnnxEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            cache_dir=settings.onnx_model_dir,
+            quantize=quantize,
+        )
+        # Keep vectors from different backends apart in the caches
+        return embeddings, f"{EMBEDDING_MODEL_NAME}#onnx-{'int8' if quantize else 'fp32'}"
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    logger.info(f"Using PyTorch embedding backend: {EMBEDDING_MODEL_NAME}")
+    embeddings = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+    return embeddings, EMBEDDING_MODEL_NAME
+
+
 class EmbeddingsService:
-    def __init__(self, settings):
+    def __init__(self, settings, vector_store: VectorStoreGateway = None):
         self.settings = settings
 
-        # Use HuggingFace embeddings
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="BAAI/bge-small-en-v1.5",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+        # Embedding model for the configured backend, fronted by the on-disk cache
+        base_embeddings, model_key = build_base_embeddings(self.settings)
+        disk_cache = None
+        if self.settings.embedding_cache_max_entries > 0:
+            try:
+                disk_cache = DiskEmbeddingCache(
+                    directory=self.settings.embedding_cache_dir,
+                    dim=EMBEDDING_DIM,
+                    max_entries=self.settings.embedding_cache_max_entries,
+                )
+            except EmbeddingCacheLocked as e:
+                # e.g. a CLI run next to the server: embed everything rather than share slots
+                logger.warning(f"{e}; running without the disk embedding cache")
+        # Shared by the chat and search paths, which both embed through self.embeddings
+        self.query_cache = None
+        if self.settings.query_cache_max_entries > 0:
+            self.query_cache = QueryEmbeddingCache(
+                max_entries=self.settings.query_cache_max_entries,
+                ttl_seconds=self.settings.query_cache_ttl_seconds,
+            )
+        # Concurrent async query embeds are coalesced into one forward pass
+        self.batcher = EmbeddingBatcher(
+            base_embeddings,
+            max_batch_size=self.settings.embed_batch_max_size,
+            max_wait_ms=self.settings.embed_batch_max_wait_ms,
         )
-
-        self.client = QdrantClient(
-            url=self.settings.qdrant_url,
-            api_key=self.settings.qdrant_api_key if self.settings.qdrant_api_key else None
+        self.embeddings = CachedEmbeddings(
+            base_embeddings, model_key, disk_cache, self.query_cache, self.batcher
         )
 
+        # Shared gateway (created in lifespan); standalone scripts get their own
+        self.vector_store = vector_store or create_vector_store(self.settings, EMBEDDING_DIM)
+        self.client = self.vector_store.client
+
+        # BM25 over the same chunks, plus the stored chunk ids per course; both
+        # are rebuilt from the store (e.g. a restored snapshot)
+        self.lexical_index = BM25Index()
+        self.manifest = CourseManifest()
+        # Whole small courses in memory, so course-scoped search skips the store;
+        # dropped whenever the manifest sees a course change
+        self.course_cache = None
+        if self.settings.course_cache_max_mb > 0:
+            self.course_cache = CourseChunkCache(
+                self.vector_store,
+                max_bytes=self.settings.course_cache_max_mb * 2**20,
+                max_chunks=self.settings.course_cache_max_chunks,
+            )
+            self.manifest.subscribe(self.course_cache.invalidate)
+        self.reload_from_store()
+
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.settings.chunk_size,
             chunk_overlap=self.settings.chunk_overlap,
-            separators=["\n\n", "\n", ". ", " ", ""]
+            separators=["\n\n", "\n", ". ", " ", ""],
+            add_start_index=True,
         )
 
-        self._ensure_collection_exists()
+    def reload_from_store(self):
+        """Rebuild the lexical index and the course manifest from stored points
+        (at startup, and after a reindex swapped the collection)"""
+        ids, docs = [], []
+        for record in self.vector_store.iter_points(with_vectors=False):
+            ids.append(record.id)
+            docs.append(payload_to_document(record.payload, record.id))
+        lexical_index = BM25Index()
+        lexical_index.add_many(ids, docs)
+        self.lexical_index = lexical_index
+        self.manifest.load((doc.id, doc.metadata) for doc in docs)
+        if ids:
+            logger.info(f"Rebuilt lexical index and manifest from {len(ids)} chunks")
 
-    def _ensure_collection_exists(self):
-        collections = self.client.get_collections().collections
-        existing_names = [c.name for c in collections]
-
-        if self.settings.collection_name not in existing_names:
-            self.client.recreate_collection(
-                collection_name=self.settings.collection_name,
-                vectors_config=VectorParams(
-                    size=384,  # bge-small-en-v1.5 dim
-                    distance=Distance.COSINE,
-                ),
-            )
-            logger.info(f"Created collection: {self.settings.collection_name}")
-
-        # Existing index for course_id at root (keep if you also filter on root)
-        try:
-            self.client.create_payload_index(
-                collection_name=self.settings.collection_name,
-                field_name="course_id",
-                field_schema=PayloadSchemaType.INTEGER,
-            )
-            logger.info("Created index for course_id")
-        except Exception as e:
-            logger.debug(f"Index course_id may already exist: {e}")
-
-        # NEW: index for nested metadata.course_id
-        try:
-            self.client.create_payload_index(
-                collection_name=self.settings.collection_name,
-                field_name="metadata.course_id",
-                field_schema=PayloadSchemaType.INTEGER,
-            )
-            logger.info("Created index for metadata.course_id")
-        except Exception as e:
-            logger.debug(f"Index metadata.course_id may already exist: {e}")
+    def warmup(self):
+        """Run one forward pass so the first real request doesn't pay for lazy init"""
+        self.embeddings.embeddings.embed_query("warmup")
 
     def _split_course_to_docs(self, course: dict) -> List:
+        return self._chunk_course_text(course, self._course_text(course))
+
+    @staticmethod
+    def _course_text(course: dict) -> str:
+        """Searchable text of a raw course dict (as in data/courses.json)"""
         parts = []
 
         title = course.get("title", "")
@@ -95,43 +155,270 @@ class EmbeddingsService:
                 lessons_text.append(f"- {l.get('title', '')}: {l.get('description', '')}")
             parts.append("Lessons:\n" + "\n".join(lessons_text))
 
-        text = "\n\n".join(p for p in parts if p.strip())
-        chunks = self.text_splitter.split_text(text)
+        return "\n\n".join(p for p in parts if p.strip())
+
+    def _chunk_course_text(self, course: dict, text: str) -> List[Document]:
+        chunks = self.text_splitter.create_documents([text])
 
-        from langchain.schema import Document
         docs = []
-        for chunk in chunks:
+        for i, chunk in enumerate(chunks):
             docs.append(
                 Document(
-                    page_content=chunk,
+                    page_content=chunk.page_content,
                     metadata={
                         "course_id": course.get("id"),
                         "title": course.get("title"),
                         "category": course.get("category"),
                         "level": course.get("level"),
                         "instructor": course.get("instructor"),
+                        "chunk_index": i,
+                        "start_index": chunk.metadata.get("start_index"),
+                    },
+                )
+            )
+        return docs
+
+    def _split_document_to_docs(self, course) -> List[Document]:
+        """Chunk a CourseDocument whose content was pre-built by the indexing scripts"""
+        chunks = self.text_splitter.create_documents([course.content])
+        docs = []
+        for i, chunk in enumerate(chunks):
+            # Both metadata structures are kept for compatibility
+            docs.append(
+                Document(
+                    page_content=chunk.page_content,
+                    metadata={
+                        "course_id": course.course_id,
+                        "metadata": {
+                            "course_id": course.course_id
+                        },
+                        "title": course.title,
+                        "instructor": course.instructor,
+                        "category": course.category,
+                        "level": course.level,
+                        "chunk_index": i,
+                        "start_index": chunk.metadata.get("start_index"),
                     },
                 )
             )
         return docs
 
-    def index_course(self, course: dict):
+    def _upsert_docs(self, docs: List[Document], vectors) -> List[str]:
+        """Write chunks to the vector store and keep the lexical index in step"""
+        ids = self.vector_store.upsert_documents(docs, vectors)
+        self.lexical_index.add_many(ids, docs)
+        return ids
+
+    def _delete_points(self, ids: List[str]):
+        self.vector_store.delete_points(ids)
+        self.lexical_index.remove_many(ids)
+
+    def _refresh_manifest(self, course_id):
+        """Re-read a course's point ids if the store no longer matches the manifest
+        (e.g. the collection was dropped or edited by another process)"""
+        if course_id is None:
+            return
+        filters = {"course_id": course_id}
+        if self.vector_store.count(filters) != self.manifest.stored_count(course_id):
+            records = self.vector_store.iter_points(with_vectors=False, filters=filters)
+            self.manifest.load_course(
+                course_id, ((r.id, (r.payload or {}).get(METADATA_KEY) or {}) for r in records)
+            )
+
+    def check_manifest(self):
+        """One count for the whole store; rebuild the manifest only if it drifted"""
+        if self.vector_store.count() != self.manifest.total():
+            logger.warning("Stored points no longer match the manifest, reloading from the store")
+            self.reload_from_store()
+
+    def _plan_course(self, course_id, docs: List[Document]):
+        """(changed chunks, stale point ids) for one course's freshly split chunks"""
+        ids = self.manifest.assign_ids(docs)
+        changed, stale = self.manifest.diff(course_id, ids)
+        return [docs[i] for i in changed], stale
+
+    def _sync_course(self, course_id, docs: List[Document]) -> dict:
+        """Embed and upsert only new or edited chunks, then delete stale ones"""
+        self._refresh_manifest(course_id)
+        changed, stale = self._plan_course(course_id, docs)
+        if changed:
+            vectors = self.embeddings.embed_documents([doc.page_content for doc in changed])
+            self._upsert_docs(changed, vectors)
+        if stale:
+            self._delete_points(stale)
+        self.manifest.update(course_id, docs)
+        return {"chunks": len(docs), "upserted": len(changed), "deleted": len(stale)}
+
+    def index_course(self, course: dict) -> dict:
         docs = self._split_course_to_docs(course)
+        stats = self._sync_course(course.get("id"), docs)
+        logger.info(f"Indexed course: {course.get('title')} ({stats})")
+        return stats
+
+    def index_document(self, course) -> dict:
+        """Index a CourseDocument posted to /api/index-course; returns chunk/upsert/delete counts"""
+        docs = self._split_document_to_docs(course)
+        stats = self._sync_course(course.course_id, docs)
+        logger.info(f"Indexed course: {course.title} ({stats})")
+        return stats
+
+    async def aindex_document(self, course) -> dict:
+        """Async index_document: embeds on a worker thread, writes via the async client"""
+        docs = self._split_document_to_docs(course)
+        await asyncio.to_thread(self._refresh_manifest, course.course_id)
+        changed, stale = self._plan_course(course.course_id, docs)
+        if changed:
+            vectors = await asyncio.to_thread(
+                self.embeddings.embed_documents, [doc.page_content for doc in changed]
+            )
+            ids = await self.vector_store.aupsert_documents(changed, vectors)
+            self.lexical_index.add_many(ids, changed)
+        if stale:
+            await self.vector_store.adelete_points(stale)
+            self.lexical_index.remove_many(stale)
+        self.manifest.update(course.course_id, docs)
+        stats = {"chunks": len(docs), "upserted": len(changed), "deleted": len(stale)}
+        logger.info(f"Indexed course: {course.title} ({stats})")
+        return stats
 
-        vector_store = Qdrant(
-            client=self.client,
-            collection_name=self.settings.collection_name,
-            embeddings=self.embeddings,
+    def index_courses_bulk(self, courses: List[dict], workers: int = None) -> dict:
+        """Index many courses, embedding changed chunks across a pool of worker processes"""
+        from .bulk_indexer import BulkIndexer
+
+        course_docs = [(course.get("id"), self._split_course_to_docs(course)) for course in courses]
+        self.check_manifest()
+        changed, stale = [], []
+        for course_id, docs in course_docs:
+            course_changed, course_stale = self._plan_course(course_id, docs)
+            changed += course_changed
+            stale += course_stale
+
+        indexer = BulkIndexer(
+            self.settings,
+            self._upsert_docs,
+            self.embeddings,
+            EMBEDDING_DIM,
+            workers=workers if workers is not None else self.settings.bulk_index_workers,
+            batch_size=self.settings.bulk_index_batch_size,
         )
+        stats = indexer.index_documents(changed)
+        if stale:
+            self._delete_points(stale)
+        for course_id, docs in course_docs:
+            self.manifest.update(course_id, docs)
+
+        stats["deleted"] = len(stale)
+        logger.info(f"Bulk indexed {len(courses)} courses: {len(changed)} chunks changed, {len(stale)} stale")
+        return stats
 
-        vector_store.add_documents(docs)
-        logger.info(f"Indexed course: {course.get('title')} with {len(docs)} chunks")
+    def _is_hybrid(self, mode: Optional[str]) -> bool:
+        return (mode or self.settings.retrieval_mode).lower() == "hybrid"
 
-    def search_similar(self, query: str, top_k: int = 3):
-        vector_store = Qdrant(
-            client=self.client,
-            collection_name=self.settings.collection_name,
-            embeddings=self.embeddings,
+    def _fuse(self, query: str, dense, top_k: int, filters, mode):
+        if not self._is_hybrid(mode):
+            return dense[:top_k]
+        lexical = self.lexical_index.search(query, self.settings.hybrid_candidates, filters)
+        return reciprocal_rank_fusion([dense, lexical], top_k)
+
+    def _dense_k(self, top_k: int, mode: Optional[str]) -> int:
+        return max(top_k, self.settings.hybrid_candidates) if self._is_hybrid(mode) else top_k
+
+    def _course_only(self, filters) -> Optional[Any]:
+        """The course_id when filters select exactly one course and nothing else"""
+        active = {k: v for k, v in (filters or {}).items() if v is not None}
+        if self.course_cache is None or list(active) != ["course_id"]:
+            return None
+        return active["course_id"]
+
+    def search_similar(self, query: str, top_k: int = 3, filters: Dict[str, Any] = None, mode: str = None):
+        """Top chunks for a query; mode "hybrid" fuses BM25 and dense rankings (scores become RRF scores)"""
+        query_vector = self.embeddings.embed_query(query)
+        k = self._dense_k(top_k, mode)
+        course_id = self._course_only(filters)
+        dense = self.course_cache.search(course_id, query_vector, k) if course_id is not None else None
+        if dense is None:
+            dense = self.vector_store.search(query_vector, k, filters)
+        return self._fuse(query, dense, top_k, filters, mode)
+
+    async def asearch_similar(self, query: str, top_k: int = 3, filters: Dict[str, Any] = None, mode: str = None):
+        """Like search_similar, but embeds the query through the micro-batcher"""
+        query_vector = await self.embeddings.aembed_query(query)
+        k = self._dense_k(top_k, mode)
+        course_id = self._course_only(filters)
+        dense = None
+        if course_id is not None:
+            # A cache miss loads the course from the store on a worker thread
+            dense = await asyncio.to_thread(self.course_cache.search, course_id, query_vector, k)
+        if dense is None:
+            dense = await self.vector_store.asearch(query_vector, k, filters)
+        return self._fuse(query, dense, top_k, filters, mode)
+
+    def _fuse_groups(self, query: str, dense_groups, top_k: int, group_size: int, filters, mode):
+        """(course_id, score, hits) per course.
+
+        Dense: the best chunk's cosine similarity, and cosine per chunk. Hybrid:
+        courses ranked by RRF over both course rankings, and each course's chunks
+        by RRF over its dense and BM25 hits, so every score is on the RRF scale.
+        """
+        if not self._is_hybrid(mode):
+            return [(course_id, hits[0][1], hits) for course_id, hits in dense_groups[:top_k]]
+
+        lexical_groups: Dict[Any, list] = {}
+        limit = max(top_k, self.settings.hybrid_candidates) * group_size
+        for doc, score in self.lexical_index.search(query, limit, filters):
+            hits = lexical_groups.setdefault(doc.metadata.get("course_id"), [])
+            if len(hits) < group_size:
+                hits.append((doc, score))
+        lexical_groups.pop(None, None)
+
+        dense_hits = dict(dense_groups)
+        fused = rrf_scores([list(dense_hits), list(lexical_groups)])
+        results = []
+        for course_id, score in list(fused.items())[:top_k]:
+            hits = reciprocal_rank_fusion(
+                [dense_hits.get(course_id, []), lexical_groups.get(course_id, [])], group_size
+            )
+            results.append((course_id, score, hits))
+        return results
+
+    def search_courses(
+        self,
+        query: str,
+        top_k: int = 5,
+        group_size: int = 3,
+        filters: Dict[str, Any] = None,
+        mode: str = None,
+    ):
+        """Top courses for a query, grouped by course_id in the vector store"""
+        query_vector = self.embeddings.embed_query(query)
+        groups = self.vector_store.search_groups(
+            query_vector, self._dense_k(top_k, mode), group_size, filters
         )
-        docs_and_scores = vector_store.similarity_search_with_score(query, k=top_k)
-        return docs_and_scores
+        return self._fuse_groups(query, groups, top_k, group_size, filters, mode)
+
+    async def asearch_courses(
+        self,
+        query: str,
+        top_k: int = 5,
+        group_size: int = 3,
+        filters: Dict[str, Any] = None,
+        mode: str = None,
+    ):
+        """Like search_courses, but embeds the query through the micro-batcher"""
+        query_vector = await self.embeddings.aembed_query(query)
+        groups = await self.vector_store.asearch_groups(
+            query_vector, self._dense_k(top_k, mode), group_size, filters
+        )
+        return self._fuse_groups(query, groups, top_k, group_size, filters, mode)
+
+    def cache_stats(self) -> dict:
+        return {
+            "query_embeddings": self.query_cache.stats() if self.query_cache else None,
+            "chunk_embeddings": {
+                "entries": len(self.embeddings.disk_cache),
+                "capacity": self.embeddings.disk_cache.capacity,
+            } if self.embeddings.disk_cache else None,
+            "query_batching": self.batcher.stats(),
+            "course_chunks": self.course_cache.stats() if self.course_cache else None,
+        }
+
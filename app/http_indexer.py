@@ -0,0 +1,153 @@
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Imported by the standalone scripts (index_all_courses.py, reset_and_reindex.py),
+# so this module only depends on httpx, not on the app package.
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Checkpoint:
+    """Append-only file of completed course ids, so an interrupted run can resume"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = Path(path) if path else None
+        self.done = set()
+        if self.path and self.path.exists():
+            self.done = {line.strip() for line in self.path.read_text(encoding="utf-8").splitlines() if line.strip()}
+        self._file = None
+
+    def __contains__(self, course_id) -> bool:
+        return str(course_id) in self.done
+
+    def add(self, course_id):
+        if self.path is None:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(f"{course_id}\n")
+        self._file.flush()
+        self.done.add(str(course_id))
+
+    def close(self, completed: bool):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # A finished run starts from scratch next time
+        if completed and self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+class AsyncCourseIndexer:
+    """Posts courses to /api/index-course over one pooled async HTTP client.
+
+    Up to ``concurrency`` requests are in flight. 5xx/429 responses, timeouts
+    and connection errors are retried with exponential backoff plus jitter;
+    other 4xx responses fail the course immediately. Completed course ids go
+    to the checkpoint file as they finish.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        api_url: str,
+        concurrency: int = 8,
+        max_retries: int = 4,
+        backoff_seconds: float = 0.5,
+        timeout: float = 60.0,
+        checkpoint_path: Optional[str] = None,
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.checkpoint = Checkpoint(checkpoint_path)
+
+    async def run(
+        self,
+        courses: List[Dict[str, Any]],
+        to_payload: Callable[[Dict[str, Any]], Dict[str, Any]],
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        start = time.perf_counter()
+        todo = [course for course in courses if course["id"] not in self.checkpoint]
+        queue: asyncio.Queue = asyncio.Queue()
+        for course in todo:
+            queue.put_nowait(course)
+
+        results: List[Dict[str, Any]] = []
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+
+            async def worker():
+                while not queue.empty():
+                    course = queue.get_nowait()
+                    result = await self._index(client, course, to_payload(course))
+                    results.append(result)
+                    if result["success"]:
+                        self.checkpoint.add(course["id"])
+                    if on_result is not None:
+                        on_result(result)
+
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(todo)) or 1)))
+
+        failed = [r for r in results if not r["success"]]
+        self.checkpoint.close(completed=not failed)
+
+        elapsed = time.perf_counter() - start
+        latencies = [r["seconds"] * 1000 for r in results if r["success"]]
+        summary = {
+            "indexed": len(results) - len(failed),
+            "failed": len(failed),
+            "skipped": len(courses) - len(todo),
+            "retries": sum(r["attempts"] - 1 for r in results),
+            "seconds": round(elapsed, 2),
+            "courses_per_second": round(len(results) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 1),
+                "p90": round(percentile(latencies, 90), 1),
+                "p99": round(percentile(latencies, 99), 1),
+                "max": round(max(latencies), 1) if latencies else 0.0,
+            },
+        }
+        return {"summary": summary, "results": results}
+
+    async def _index(self, client: httpx.AsyncClient, course, payload) -> Dict[str, Any]:
+        error = None
+        for attempt in range(1, self.max_retries + 2):
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{self.api_url}/index-course", json=payload)
+                if response.status_code == 200:
+                    return {"success": True, "course": course, "attempts": attempt,
+                            "seconds": time.perf_counter() - start, "response": response.json()}
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code not in self.RETRY_STATUSES:
+                    break
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt <= self.max_retries:
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                delay += random.uniform(0, self.backoff_seconds)
+                logger.warning(f"Course {course['id']} attempt {attempt} failed ({error}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        return {"success": False, "course": course, "attempts": attempt, "seconds": 0.0, "error": error}
@@ -1,5 +1,6 @@
 import requests
 import json
+import sys
 import time
 from typing import Dict, List, Any, Optional
 
@@ -280,6 +281,37 @@ COURSES = [
 
 
 API_URL = "http://localhost:8000/api"
+# Readiness probe: 503 while the backend is still loading models, 200 once it can serve
+READY_URL = "http://localhost:8000/ready"
+READY_TIMEOUT = 300
+# Completed course ids of an interrupted --async run (removed once a run succeeds)
+CHECKPOINT_FILE = ".cache/index_checkpoint.txt"
+
+
+def wait_until_ready(timeout: float = READY_TIMEOUT, interval: float = 2.0) -> bool:
+    """Poll /ready until the backend has loaded its models, failed, or timed out"""
+    deadline = time.monotonic() + timeout
+    last = None
+    while True:
+        try:
+            response = requests.get(READY_URL, timeout=5)
+            if response.status_code == 200:
+                return True
+            is_json = response.headers.get("content-type", "").startswith("application/json")
+            report = response.json() if is_json else {}
+            if report.get("status") == "failed":
+                print(f"❌ Backend failed to start: {report.get('error')}")
+                return False
+            state = f"⏳ Backend is {report.get('status', f'returning {response.status_code}')}..."
+        except requests.RequestException as e:
+            state = f"⏳ Backend not reachable yet ({type(e).__name__})..."
+        if state != last:
+            print(state)
+            last = state
+        if time.monotonic() + interval > deadline:
+            print(f"❌ Backend not ready after {timeout:.0f}s")
+            return False
+        time.sleep(interval)
 
 
 def build_course_content(course: Dict[str, Any]) -> str:
@@ -328,19 +360,22 @@ def build_course_content(course: Dict[str, Any]) -> str:
     return "\n".join(content_parts)
 
 
-def index_course(course: Dict[str, Any]) -> Dict[str, Any]:
-    """Index a single course to the RAG system"""
-    content = build_course_content(course)
-    
-    data = {
+def course_document(course: Dict[str, Any]) -> Dict[str, Any]:
+    """CourseDocument payload for the indexing endpoints"""
+    return {
         "course_id": course["id"],  # This goes to the top level
         "title": course["title"],
         "description": course["description"],
-        "content": content,
+        "content": build_course_content(course),
         "instructor": course["instructor"],
         "category": course["category"],
         "level": course["level"]
     }
+
+
+def index_course(course: Dict[str, Any]) -> Dict[str, Any]:
+    """Index a single course to the RAG system"""
+    data = course_document(course)
     
     try:
         response = requests.post(
@@ -357,26 +392,79 @@ def index_course(course: Dict[str, Any]) -> Dict[str, Any]:
         return {"success": False, "course": course, "error": str(e)}
 
 
+def index_courses_bulk(courses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stream all courses as NDJSON to /index-courses in a single request"""
+    def body():
+        for course in courses:
+            yield (json.dumps(course_document(course)) + "\n").encode("utf-8")
+    
+    by_id = {course["id"]: course for course in courses}
+    try:
+        response = requests.post(
+            f"{API_URL}/index-courses",
+            data=body(),
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=600
+        )
+        if response.status_code != 200:
+            return [{"success": False, "course": c, "error": response.text} for c in courses]
+        
+        summary = response.json()
+        print(f"    ⏱️  Server timing: {summary['timing']}")
+        return [
+            {"success": r["status"] == "indexed", "course": by_id[r["course_id"]], "error": r.get("error")}
+            for r in summary["results"]
+        ]
+    except Exception as e:
+        return [{"success": False, "course": c, "error": str(e)} for c in courses]
+
+
+def index_courses_async(
+    courses: List[Dict[str, Any]],
+    concurrency: int = 8,
+    checkpoint: Optional[str] = CHECKPOINT_FILE,
+) -> List[Dict[str, Any]]:
+    """Index courses concurrently with retries; resumes from the checkpoint file"""
+    import asyncio
+    from http_indexer import AsyncCourseIndexer
+    
+    def report(result: Dict[str, Any]) -> None:
+        course = result['course']
+        if result['success']:
+            retries = f" after {result['attempts'] - 1} retries" if result['attempts'] > 1 else ""
+            print(f"    ✅ {course['title']} ({result['seconds'] * 1000:.0f}ms{retries})")
+        else:
+            print(f"    ❌ {course['title']}: {result['error']}")
+    
+    indexer = AsyncCourseIndexer(API_URL, concurrency=concurrency, checkpoint_path=checkpoint)
+    outcome = asyncio.run(indexer.run(courses, course_document, on_result=report))
+    summary = outcome["summary"]
+    print(f"\n    📈 {summary['courses_per_second']} courses/s, {summary['retries']} retries, "
+          f"{summary['skipped']} skipped (checkpoint)")
+    print(f"    ⏱️  Latency: {summary['latency_ms']}")
+    return outcome["results"]
+
+
+def _arg_value(name: str, default: int) -> int:
+    """Value following a --flag on the command line"""
+    if name in sys.argv[1:-1]:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
 def main() -> None:
     print("=" * 80)
     print(" " * 20 + "🎓 E-LEARNING COURSE INDEXING SYSTEM 🎓")
     print("=" * 80)
     
-    # Test backend connection
-    print("\n📡 Testing backend connection...")
-    try:
-        response = requests.get("http://localhost:8000/health", timeout=5)
-        if response.status_code == 200:
-            print("✅ Backend is running and healthy!\n")
-        else:
-            print(f"❌ Backend returned unexpected status: {response.status_code}")
-            return
-    except Exception as e:
-        print(f"❌ Cannot connect to backend: {str(e)}")
+    # /health answers as soon as the server is up; /ready only once the models are loaded
+    print("\n📡 Waiting for the backend to be ready...")
+    if not wait_until_ready(timeout=_arg_value("--ready-timeout", READY_TIMEOUT)):
         print("\n🔧 Make sure backend is running:")
         print("   cd e_learning_AI")
         print("   uvicorn app.main:app --reload --port 8000")
         return
+    print("✅ Backend is ready!\n")
     
     print(f"📚 Preparing to index {len(COURSES)} courses...\n")
     print("=" * 80)
@@ -387,29 +475,43 @@ def main() -> None:
     
     start_time = time.time()
     
-    for i, course in enumerate(COURSES, 1):
-        print(f"\n[{i}/{len(COURSES)}] Processing: {course['title']}")
-        print(f"    📋 ID: {course['id']}")
-        print(f"    👨‍🏫 Instructor: {course['instructor']}")
-        print(f"    📂 Category: {course['category']}")
-        print(f"    📊 Level: {course['level']}")
-        print(f"    🎥 Lessons: {len(course.get('lessons', []))}")
-        print(f"    ⏱️  Indexing...", end=" ", flush=True)
+    if "--bulk" in sys.argv[1:]:
+        # One streaming request; the server batches embeddings across courses
+        print(f"\n📦 Streaming {len(COURSES)} courses to /index-courses...")
+        results = index_courses_bulk(COURSES)
+        success_count = sum(1 for r in results if r['success'])
+        fail_count = len(results) - success_count
+    elif "--async" in sys.argv[1:]:
+        # Pooled async client: bounded concurrency, retries, resumable checkpoint
+        concurrency = _arg_value("--concurrency", 8)
+        print(f"\n⚡ Indexing {len(COURSES)} courses with {concurrency} concurrent requests...")
+        results = index_courses_async(COURSES, concurrency=concurrency)
+        success_count = sum(1 for r in results if r['success'])
+        fail_count = len(results) - success_count
+    else:
+        for i, course in enumerate(COURSES, 1):
+            print(f"\n[{i}/{len(COURSES)}] Processing: {course['title']}")
+            print(f"    📋 ID: {course['id']}")
+            print(f"    👨‍🏫 Instructor: {course['instructor']}")
+            print(f"    📂 Category: {course['category']}")
+            print(f"    📊 Level: {course['level']}")
+            print(f"    🎥 Lessons: {len(course.get('lessons', []))}")
+            print(f"    ⏱️  Indexing...", end=" ", flush=True)
         
-        result = index_course(course)
-        results.append(result)
+            result = index_course(course)
+            results.append(result)
         
-        if result['success']:
-            print("✅ SUCCESS")
-            success_count += 1
-        else:
-            print("❌ FAILED")
-            print(f"       Error: {result['error']}")
-            fail_count += 1
+            if result['success']:
+                print("✅ SUCCESS")
+                success_count += 1
+            else:
+                print("❌ FAILED")
+                print(f"       Error: {result['error']}")
+                fail_count += 1
         
-        # Small delay between requests
-        if i < len(COURSES):
-            time.sleep(0.5)
+            # Small delay between requests
+            if i < len(COURSES):
+                time.sleep(0.5)
     
     elapsed_time = time.time() - start_time
     
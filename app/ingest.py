@@ -0,0 +1,554 @@
+from pydantic import ValidationError
+from typing import Any, AsyncIterable, List, Tuple
+import asyncio
+import codecs
+import json
+import logging
+import queue
+import re
+import threading
+import time
+
+from .models import CourseDocument
+
+logger = logging.getLogger(__name__)
+
+
+class MalformedJson:
+    """Stands in for a top-level value that isn't valid JSON, so the stream can go on"""
+
+    def __init__(self, text: str, error: str):
+        self.text = text
+        self.error = error
+
+    def __str__(self) -> str:
+        return f"Malformed JSON ({self.error}): {self.text[:80]!r}"
+
+
+class TruncatedJson(ValueError):
+    """The stream ended in the middle of a value"""
+
+
+class JsonStreamDecoder:
+    """Incremental parser for NDJSON, a JSON array, or concatenated JSON objects.
+
+    ``feed`` takes text as it arrives and returns the top-level values (array
+    elements, for an array) completed so far; only the unfinished tail is kept
+    in memory. Objects are scanned once for their closing brace before being
+    decoded, so a partial object costs nothing to wait on. An object that is
+    already invalid at a line break comes back as ``MalformedJson`` once its
+    closing brace (or a line starting a new object) is reached, and parsing
+    goes on from there.
+    """
+
+    _SEPARATORS = " \t\r\n,[]"
+    _SPECIAL_RE = re.compile(r'[{}\[\]"\\\n]')
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        # Scan state of the unfinished object at the start of the buffer
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+        self._broken = None
+
+    def feed(self, text: str) -> List[Any]:
+        self._buffer += text
+        buffer = self._buffer
+        values = []
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in self._SEPARATORS:
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "{":
+                end, error = self._scan_object(pos)
+            else:
+                end, error = self._scan_scalar(pos)
+            if end is None:
+                break  # incomplete value: wait for more input
+            if error is None:
+                values.append(self._decoder.raw_decode(buffer, pos)[0])
+            else:
+                values.append(MalformedJson(buffer[pos:end].strip(), error))
+                logger.warning(f"Skipping malformed JSON value: {values[-1]}")
+            pos = end
+            self._scan, self._depth, self._in_string, self._broken = end, 0, False, None
+
+        self._buffer = buffer[pos:]
+        self._scan = max(self._scan - pos, 0)
+        return values
+
+    def _scan_object(self, start: int):
+        """(end, error) of the object at ``start``, or (None, None) if it isn't complete yet"""
+        buffer = self._buffer
+        i = max(self._scan, start)
+        while True:
+            match = self._SPECIAL_RE.search(buffer, i)
+            if match is None:
+                self._scan = len(buffer)
+                return None, None
+            char, i = match.group(), match.end()
+            if self._in_string:
+                if char == "\\":
+                    if i == len(buffer):
+                        self._scan = match.start()  # rescan the escape once its character arrives
+                        return None, None
+                    i += 1
+                elif char == '"':
+                    self._in_string = False
+                elif char == "\n":
+                    return i, "newline inside a string"
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._broken:
+                        return i, self._broken
+                    try:
+                        self._decoder.raw_decode(buffer[start:i])
+                    except json.JSONDecodeError as e:
+                        return i, e.msg
+                    return i, None
+            elif char == "\n":
+                if i == len(buffer):
+                    self._scan = match.start()  # decide once the next line has started
+                    return None, None
+                if self._broken:
+                    # A broken object ends at its closing brace, or where a line
+                    # opens a new object (NDJSON line missing its closing brace)
+                    if buffer[i] == "{":
+                        return i, self._broken
+                    continue
+                # Still open at a line break: fine unless the text so far is already invalid
+                prefix = buffer[start:match.start()].rstrip()
+                try:
+                    self._decoder.raw_decode(prefix)
+                except json.JSONDecodeError as e:
+                    if e.pos < len(prefix):
+                        line_start = prefix.rfind("\n", 0, e.pos) + 1
+                        if line_start > 0 and prefix[line_start] == "{":
+                            return start + line_start, e.msg
+                        self._broken = e.msg
+                        if buffer[i] == "{":
+                            return i, self._broken
+
+    def _scan_scalar(self, start: int):
+        """Top-level strings, numbers and literals: decoded directly, malformed up to the line end"""
+        try:
+            _, end = self._decoder.raw_decode(self._buffer, start)
+            return end, None
+        except json.JSONDecodeError as e:
+            newline = self._buffer.find("\n", start)
+            if newline == -1:
+                return None, None
+            return newline + 1, e.msg
+
+    def close(self, trailing: str = ""):
+        """Fail on leftover input; ``trailing`` lists extra characters allowed at the end"""
+        if self._buffer.strip(self._SEPARATORS + trailing):
+            raise TruncatedJson(f"Truncated JSON at end of stream: {self._buffer[:80]!r}")
+
+
+async def aiter_json_values(chunks: AsyncIterable[bytes]):
+    """Yield JSON values from a byte stream (e.g. ``Request.stream()``) as they complete"""
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    decoder = JsonStreamDecoder()
+    async for chunk in chunks:
+        for value in decoder.feed(text_decoder.decode(chunk)):
+            yield value
+    for value in decoder.feed(text_decoder.decode(b"", final=True)):
+        yield value
+    decoder.close()
+
+
+# {"courses": [...]} as in data/courses.json: the array is streamed element by element
+_WRAPPER_RE = re.compile(r'\{\s*"courses"\s*:\s*\[')
+
+
+def iter_json_file(path: str, chunk_size: int = 1 << 16):
+    """Yield JSON values from a file (NDJSON, an array, or {"courses": [...]}) without loading it whole"""
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    decoder = JsonStreamDecoder()
+    with open(path, "rb") as f:
+        # Sniff the opening bytes for the wrapper object
+        head = text_decoder.decode(f.read(4096)).lstrip()
+        match = _WRAPPER_RE.match(head)
+        yield from decoder.feed(head[match.end():] if match else head)
+        while True:
+            chunk = f.read(chunk_size)
+            yield from decoder.feed(text_decoder.decode(chunk, final=not chunk))
+            if not chunk:
+                break
+    decoder.close(trailing="}" if match else "")
+
+
+class _CourseEntry:
+    """Per-course progress: chunks still waiting for their batch to be upserted"""
+
+    def __init__(self, course_id, docs, stale, remaining: int):
+        self.course_id = course_id
+        self.docs = docs
+        self.stale = stale
+        self.remaining = remaining
+
+
+class BatchIngestor:
+    """Indexes a stream of courses with embedding/upsert batches spanning courses.
+
+    Chunks of consecutive courses are pooled until ``batch_size`` of them are
+    waiting, then embedded in one call and upserted in one request. The upsert
+    of a batch overlaps with embedding the next one. A course's stale chunks are
+    deleted (and its manifest entry updated) once all its new chunks are stored.
+    """
+
+    def __init__(self, embeddings_service, batch_size: int = 256):
+        self.service = embeddings_service
+        self.batch_size = batch_size
+        self._pending: List[Tuple[Any, _CourseEntry]] = []
+        self._upsert_task = None
+        self._results: List[dict] = []
+        self._timing = {"embed_seconds": 0.0, "upsert_seconds": 0.0}
+
+    async def ingest(self, values: AsyncIterable[Any]) -> dict:
+        start = time.perf_counter()
+        await asyncio.to_thread(self.service.check_manifest)
+
+        try:
+            async for value in values:
+                if isinstance(value, MalformedJson):
+                    self._results.append({"course_id": None, "status": "error", "error": str(value)})
+                    continue
+                try:
+                    course = CourseDocument.model_validate(value)
+                except ValidationError as e:
+                    self._results.append({"course_id": _course_id_of(value), "status": "error", "error": str(e)})
+                    continue
+                await self._add_course(course)
+        except TruncatedJson as e:
+            # The courses before the cut are whole: store them, report the cut-off one
+            self._results.append({"course_id": None, "status": "error", "error": str(e)})
+
+        await self._flush()
+        await self._wait_for_upsert()
+
+        elapsed = time.perf_counter() - start
+        indexed = [r for r in self._results if r["status"] == "indexed"]
+        totals = {
+            "courses": len(indexed),
+            "failed": len(self._results) - len(indexed),
+            "chunks": sum(r["chunks"] for r in indexed),
+            "upserted": sum(r["upserted"] for r in indexed),
+            "deleted": sum(r["deleted"] for r in indexed),
+        }
+        timing = {key: round(value, 3) for key, value in self._timing.items()}
+        timing["seconds"] = round(elapsed, 3)
+        timing["chunks_per_second"] = round(totals["chunks"] / elapsed, 1) if elapsed else 0.0
+        logger.info(f"Ingested {totals} in {elapsed:.2f}s")
+        return {"results": self._results, "totals": totals, "timing": timing}
+
+    async def _add_course(self, course: CourseDocument):
+        docs = self.service._split_document_to_docs(course)
+        changed, stale = self.service._plan_course(course.course_id, docs)
+        result = {
+            "course_id": course.course_id,
+            "status": "indexed",
+            "chunks": len(docs),
+            "upserted": len(changed),
+            "deleted": len(stale),
+        }
+        self._results.append(result)
+
+        entry = _CourseEntry(course.course_id, docs, stale, len(changed))
+        if not changed:
+            await self._finish(entry)
+            return
+        self._pending.extend((doc, entry) for doc in changed)
+        while len(self._pending) >= self.batch_size:
+            await self._flush()
+
+    async def _flush(self):
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        if not batch:
+            return
+        start = time.perf_counter()
+        docs = [doc for doc, _ in batch]
+        vectors = await asyncio.to_thread(
+            self.service.embeddings.embed_documents, [doc.page_content for doc in docs]
+        )
+        self._timing["embed_seconds"] += time.perf_counter() - start
+
+        # One upsert in flight at a time, overlapping the next embedding batch
+        await self._wait_for_upsert()
+        self._upsert_task = asyncio.create_task(self._upsert(batch, vectors))
+
+    async def _upsert(self, batch, vectors):
+        start = time.perf_counter()
+        docs = [doc for doc, _ in batch]
+        ids = await self.service.vector_store.aupsert_documents(docs, vectors)
+        self.service.lexical_index.add_many(ids, docs)
+        self._timing["upsert_seconds"] += time.perf_counter() - start
+
+        for _, entry in batch:
+            entry.remaining -= 1
+            if entry.remaining == 0:
+                await self._finish(entry)
+
+    async def _wait_for_upsert(self):
+        if self._upsert_task is not None:
+            task, self._upsert_task = self._upsert_task, None
+            await task
+
+    async def _finish(self, entry: _CourseEntry):
+        if entry.stale:
+            await self.service.vector_store.adelete_points(entry.stale)
+            self.service.lexical_index.remove_many(entry.stale)
+        self.service.manifest.update(entry.course_id, entry.docs)
+
+
+def _course_id_of(value) -> Any:
+    return value.get("course_id") if isinstance(value, dict) else None
+
+
+_DONE = object()
+
+
+class _StageStats:
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.busy = 0.0
+        self.waiting = 0.0
+
+    def report(self) -> dict:
+        return {
+            "stage": self.name,
+            self.unit: self.items,
+            "busy_seconds": round(self.busy, 3),
+            f"{self.unit}_per_second": round(self.items / self.busy, 1) if self.busy else 0.0,
+        }
+
+
+class IngestPipeline:
+    """In-process ingestion from files: parse -> build -> chunk -> embed batch -> upsert batch.
+
+    Each stage runs on its own thread, connected by bounded queues, so the
+    slowest stage (normally embedding) throttles the file reader instead of the
+    catalog piling up in memory. Embedding and upsert batches span courses, and
+    a course's stale chunks are deleted once the batch holding its last new
+    chunk is stored.
+    """
+
+    def __init__(self, embeddings_service, batch_size: int = 256, queue_size: int = 8):
+        self.service = embeddings_service
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.results: List[dict] = []
+        self._errors: List[BaseException] = []
+
+    def run(self, paths: List[str]) -> dict:
+        start = time.perf_counter()
+        self.service.check_manifest()
+
+        stages = [
+            (_StageStats("parse", "courses"), lambda _: self._parse(paths)),
+            (_StageStats("build", "courses"), self._build),
+            (_StageStats("chunk", "courses"), self._chunk),
+            (_StageStats("embed", "chunks"), self._embed),
+            (_StageStats("upsert", "chunks"), self._upsert),
+        ]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(stages) - 1)]
+        threads = []
+        for i, (stats, transform) in enumerate(stages):
+            source = queues[i - 1] if i > 0 else None
+            sink = queues[i] if i < len(queues) else None
+            thread = threading.Thread(
+                target=self._drive, args=(stats, transform, source, sink), name=f"ingest-{stats.name}", daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+        elapsed = time.perf_counter() - start
+        indexed = [r for r in self.results if r["status"] == "indexed"]
+        totals = {
+            "courses": len(indexed),
+            "failed": len(self.results) - len(indexed),
+            "chunks": sum(r["chunks"] for r in indexed),
+            "upserted": sum(r["upserted"] for r in indexed),
+            "deleted": sum(r["deleted"] for r in indexed),
+            "seconds": round(elapsed, 3),
+        }
+        logger.info(f"Ingested {totals}")
+        return {"totals": totals, "stages": [stats.report() for stats, _ in stages]}
+
+    def _drive(self, stats: _StageStats, transform, source, sink):
+        def consume():
+            while True:
+                t0 = time.perf_counter()
+                item = source.get()
+                stats.waiting += time.perf_counter() - t0
+                if item is _DONE:
+                    return
+                yield item
+
+        try:
+            outputs = transform(consume() if source is not None else None)
+            while True:
+                t0 = time.perf_counter()
+                waited = stats.waiting
+                try:
+                    item, count = next(outputs)
+                except StopIteration:
+                    break
+                stats.busy += time.perf_counter() - t0 - (stats.waiting - waited)
+                stats.items += count
+                if sink is not None:
+                    sink.put(item)
+        except BaseException as e:
+            logger.error(f"Ingest stage {stats.name} failed: {e}")
+            self._errors.append(e)
+            # Keep draining so upstream stages can't block on a full queue
+            if source is not None:
+                for _ in consume():
+                    pass
+        finally:
+            if sink is not None:
+                sink.put(_DONE)
+
+    # Each stage yields (item for the next stage, units processed)
+
+    def _parse(self, paths: List[str]):
+        for path in paths:
+            try:
+                for value in iter_json_file(path):
+                    if self._errors:
+                        return
+                    # A whole {"courses": [...]} object arrives when the sniffer can't stream it
+                    if isinstance(value, dict) and isinstance(value.get("courses"), list):
+                        for course in value["courses"]:
+                            yield course, 1
+                    else:
+                        yield value, 1
+            except TruncatedJson as e:
+                self.results.append({"course_id": None, "status": "error", "error": f"{path}: {e}"})
+
+    def _build(self, values):
+        for value in values:
+            try:
+                if isinstance(value, MalformedJson):
+                    raise ValueError(str(value))
+                if isinstance(value, dict) and "content" in value and "course_id" in value:
+                    yield (CourseDocument.model_validate(value), None), 1
+                elif isinstance(value, dict) and value.get("id") is not None:
+                    yield (value, self.service._course_text(value)), 1
+                else:
+                    raise ValueError("expected a course with an id, or a CourseDocument")
+            except (ValidationError, ValueError) as e:
+                self.results.append({"course_id": _course_id_of(value), "status": "error", "error": str(e)})
+
+    def _chunk(self, built):
+        for course, text in built:
+            if isinstance(course, CourseDocument):
+                course_id = course.course_id
+                docs = self.service._split_document_to_docs(course)
+            else:
+                course_id = course["id"]
+                docs = self.service._chunk_course_text(course, text)
+            changed, stale = self.service._plan_course(course_id, docs)
+            self.results.append({
+                "course_id": course_id,
+                "status": "indexed",
+                "chunks": len(docs),
+                "upserted": len(changed),
+                "deleted": len(stale),
+            })
+            yield (course_id, docs, changed, stale), 1
+
+    def _embed(self, planned):
+        pending: List = []
+        # (end position in pending, course): the course is complete once that prefix is stored
+        closing: List[Tuple[int, Tuple]] = []
+
+        def take(size: int):
+            batch = pending[:size]
+            del pending[:size]
+            done = [course for end, course in closing if end <= size]
+            closing[:] = [(end - size, course) for end, course in closing if end > size]
+            vectors = self.service.embeddings.embed_documents([doc.page_content for doc in batch]) if batch else []
+            return (batch, vectors, done), len(batch)
+
+        for course_id, docs, changed, stale in planned:
+            pending.extend(changed)
+            closing.append((len(pending), (course_id, docs, stale)))
+            while len(pending) >= self.batch_size:
+                yield take(self.batch_size)
+        if pending or closing:
+            yield take(len(pending))
+
+    def _upsert(self, batches):
+        for docs, vectors, done in batches:
+            if docs:
+                self.service._upsert_docs(docs, vectors)
+            for course_id, course_docs, stale in done:
+                if stale:
+                    self.service._delete_points(stale)
+                self.service.manifest.update(course_id, course_docs)
+            yield None, len(docs)
+
+
+if __name__ == "__main__":
+    # python -m app.ingest data/courses.json [more.ndjson ...]  (in-process, no HTTP server)
+    import argparse
+    import sys
+
+    from .config import get_settings
+    from .embeddings_service import EMBEDDING_DIM, EmbeddingsService
+    from .vector_store import create_vector_store
+
+    parser = argparse.ArgumentParser(description="Stream courses from JSON/NDJSON files into the index")
+    parser.add_argument("paths", nargs="*", default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--queue-size", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    vector_store = create_vector_store(settings, EMBEDDING_DIM)
+    snapshotter = None
+    if vector_store.is_local:
+        # An in-memory store only outlives this process through its snapshot
+        if not settings.snapshot_dir:
+            sys.exit("Refusing to ingest into an in-memory store with no snapshot_dir: "
+                     "the vectors would be lost on exit. Set QDRANT_URL or SNAPSHOT_DIR.")
+        from .snapshot import CollectionSnapshotter
+
+        snapshotter = CollectionSnapshotter(vector_store, settings.snapshot_dir)
+        snapshotter.restore()
+
+    service = EmbeddingsService(settings, vector_store=vector_store)
+    pipeline = IngestPipeline(
+        service,
+        batch_size=args.batch_size or settings.ingest_batch_size,
+        queue_size=args.queue_size,
+    )
+    summary = pipeline.run(args.paths or [settings.courses_file])
+    if snapshotter is not None:
+        snapshotter.save_if_changed()
+
+    print("\n📊 Per-stage throughput:")
+    for stage in summary["stages"]:
+        print(f"   {stage}")
+    print(f"\n✅ {summary['totals']}")
+    for result in pipeline.results:
+        if result["status"] != "indexed":
+            print(f"❌ course {result['course_id']}: {result['error']}")
@@ -0,0 +1,190 @@
+from langchain_core.documents import Document
+from array import array
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import logging
+import math
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Keeps tool names intact ("scikit-learn", "node.js", "c++", "c#")
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*[+#]*")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        # Compound tokens are also indexed by their parts ("scikit-learn" -> "scikit", "learn")
+        if "-" in token or "." in token:
+            tokens.extend(part for part in re.split(r"[.\-]", token) if part)
+    return tokens
+
+
+class BM25Index:
+    """Incremental in-process inverted index with BM25 scoring.
+
+    Postings are two parallel ``array('I')`` per term (doc numbers and term
+    frequencies), scored with NumPy views over those buffers. Upserting an
+    existing point id replaces it; removed documents are tombstoned and the
+    postings are compacted once a quarter of the documents are dead.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_of: Dict[str, int] = {}
+        self._point_ids: List[Optional[str]] = []
+        self._docs: List[Optional[Document]] = []
+        self._doc_len = array("I")
+        self._alive = bytearray()
+        self._live_count = 0
+        self._total_len = 0
+
+    def __len__(self):
+        return self._live_count
+
+    def add_many(self, point_ids: Sequence[Any], docs: Sequence[Document]):
+        with self._lock:
+            for point_id, doc in zip(point_ids, docs):
+                self._add(str(point_id), doc)
+
+    def _add(self, point_id: str, doc: Document):
+        self._remove(point_id)
+
+        tokens = tokenize(doc.page_content)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+
+        doc_number = len(self._point_ids)
+        self._point_ids.append(point_id)
+        self._docs.append(Document(id=point_id, page_content=doc.page_content, metadata=doc.metadata))
+        self._doc_len.append(len(tokens))
+        self._alive.append(1)
+        self._doc_of[point_id] = doc_number
+        self._live_count += 1
+        self._total_len += len(tokens)
+
+        for token, tf in counts.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = (array("I"), array("I"))
+            postings[0].append(doc_number)
+            postings[1].append(tf)
+
+    def remove_many(self, point_ids: Iterable[Any]):
+        with self._lock:
+            for point_id in point_ids:
+                self._remove(str(point_id))
+            if self._live_count < len(self._point_ids) * 0.75:
+                self._compact()
+
+    def _remove(self, point_id: str):
+        doc_number = self._doc_of.pop(point_id, None)
+        if doc_number is None:
+            return
+        self._alive[doc_number] = 0
+        self._docs[doc_number] = None
+        self._live_count -= 1
+        self._total_len -= self._doc_len[doc_number]
+
+    def _compact(self):
+        """Renumber live documents and drop dead entries from every posting list"""
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        new_number = np.cumsum(alive) - 1
+
+        postings = {}
+        for token, (docs, tfs) in self._postings.items():
+            doc_arr = np.frombuffer(docs, dtype=np.uint32)
+            keep = alive[doc_arr]
+            if not keep.any():
+                continue
+            postings[token] = (
+                array("I", new_number[doc_arr[keep]].astype(np.uint32).tobytes()),
+                array("I", np.frombuffer(tfs, dtype=np.uint32)[keep].tobytes()),
+            )
+
+        live = np.flatnonzero(alive)
+        self._postings = postings
+        self._point_ids = [self._point_ids[i] for i in live]
+        self._docs = [self._docs[i] for i in live]
+        self._doc_len = array("I", np.frombuffer(self._doc_len, dtype=np.uint32)[live].tobytes())
+        self._alive = bytearray(b"\x01" * len(live))
+        self._doc_of = {point_id: i for i, point_id in enumerate(self._point_ids)}
+        logger.info(f"Compacted lexical index to {len(live)} documents")
+
+    @staticmethod
+    def _matches(metadata: dict, filters: Dict[str, Any]) -> bool:
+        return all(metadata.get(key) == value for key, value in filters.items())
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        with self._lock:
+            if not self._live_count:
+                return []
+            doc_count = len(self._point_ids)
+            avg_len = self._total_len / self._live_count
+            doc_len = np.frombuffer(self._doc_len, dtype=np.uint32).astype(np.float32)
+            scores = np.zeros(doc_count, dtype=np.float32)
+
+            for token in set(tokenize(query)):
+                postings = self._postings.get(token)
+                if postings is None:
+                    continue
+                docs = np.frombuffer(postings[0], dtype=np.uint32)
+                tfs = np.frombuffer(postings[1], dtype=np.uint32).astype(np.float32)
+                df = len(docs)
+                idf = math.log(1 + (self._live_count - df + 0.5) / (df + 0.5))
+                norm = tfs + self.k1 * (1 - self.b + self.b * doc_len[docs] / avg_len)
+                scores[docs] += idf * tfs * (self.k1 + 1) / norm
+
+            scores *= np.frombuffer(bytes(self._alive), dtype=np.uint8)
+            candidates = np.flatnonzero(scores > 0)
+            if filters:
+                candidates = [i for i in candidates if self._matches(self._docs[i].metadata, filters)]
+                candidates = np.asarray(candidates, dtype=np.int64)
+            if len(candidates) == 0:
+                return []
+
+            k = min(top_k, len(candidates))
+            top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            top = top[np.argsort(-scores[top])]
+            return [(self._docs[i], float(scores[i])) for i in top]
+
+
+def rrf_scores(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> Dict[Hashable, float]:
+    """Sum of 1 / (k + rank) per key over several rankings, best first"""
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return dict(sorted(fused.items(), key=lambda item: item[1], reverse=True))
+
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[Sequence[Tuple[Document, float]]],
+    top_k: int,
+    k: int = 60,
+) -> List[Tuple[Document, float]]:
+    """Fuse ranked lists by sum of 1 / (k + rank); documents are matched by Document.id"""
+    docs: Dict[str, Document] = {}
+    rankings = []
+    for results in result_lists:
+        ranking = []
+        for doc, _ in results:
+            key = doc.id or doc.page_content
+            docs.setdefault(key, doc)
+            ranking.append(key)
+        rankings.append(ranking)
+    fused = rrf_scores(rankings, k)
+    return [(docs[key], score) for key, score in list(fused.items())[:top_k]]
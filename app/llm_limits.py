@@ -0,0 +1,98 @@
+from contextlib import nullcontext
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LLMTimeoutError(TimeoutError):
+    pass
+
+
+class ProviderLimiter:
+    """Caps in-flight LLM calls to one provider and bounds how long each may take.
+
+    Calls beyond ``max_concurrency`` queue on a semaphore (0 = unbounded)
+    instead of piling onto the provider's rate limit. ``timeout_seconds``
+    covers queueing plus the call itself, so an overloaded or stalled
+    provider surfaces as ``LLMTimeoutError`` rather than a hung request.
+    """
+
+    def __init__(self, provider: str, max_concurrency: int, timeout_seconds: float):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self.pending = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.timeouts = 0
+
+    async def _limited(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        self.pending += 1
+        try:
+            async with self.semaphore or nullcontext():
+                self.in_flight += 1
+                try:
+                    return await make_call()
+                finally:
+                    self.in_flight -= 1
+        finally:
+            self.pending -= 1
+
+    async def _limited_stream(self, make_stream: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        self.pending += 1
+        try:
+            async with self.semaphore or nullcontext():
+                self.in_flight += 1
+                try:
+                    async for item in make_stream():
+                        yield item
+                finally:
+                    self.in_flight -= 1
+        finally:
+            self.pending -= 1
+
+    def _timed_out(self) -> LLMTimeoutError:
+        self.timeouts += 1
+        logger.warning(f"{self.provider} LLM call timed out after {self.timeout_seconds}s")
+        return LLMTimeoutError(f"LLM provider {self.provider} did not answer within {self.timeout_seconds}s")
+
+    async def call(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Await make_call() under the provider cap and timeout"""
+        self.calls += 1
+        try:
+            return await asyncio.wait_for(self._limited(make_call), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            raise self._timed_out() from None
+
+    async def stream(self, make_stream: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Iterate make_stream() under the provider cap; the timeout covers the whole stream"""
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_seconds
+        items = self._limited_stream(make_stream)
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(items.__anext__(), deadline - loop.time())
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    raise self._timed_out() from None
+                yield item
+        finally:
+            await items.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.pending - self.in_flight,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+        }
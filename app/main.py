@@ -1,38 +1,105 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
-from typing import List
+from typing import List, Optional
+import asyncio
+import json
 import logging
 
 from .config import get_settings
-from .models import ChatMessage, ChatResponse, SearchQuery, SearchResult, CourseDocument
-from .embeddings_service import EmbeddingsService
-from .rag_service import RAGService
-from langchain.vectorstores import Qdrant
+from .llm_limits import LLMTimeoutError
+from .models import ChatMessage, ChatResponse, ChunkMatch, ReindexRequest, SearchQuery, SearchResult, CourseDocument
+from .startup import StartupTimer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global services
+# Global services (populated by the background warmup)
 embeddings_service = None
 rag_service = None
+snapshotter = None
+startup_timer = StartupTimer()
+
+def _initialize_services(settings):
+    """Import and build the heavy services; runs in a worker thread"""
+    global embeddings_service, rag_service, snapshotter
+
+    with startup_timer.phase("import_embeddings_service"):
+        from .embeddings_service import EMBEDDING_DIM, EmbeddingsService
+        from .vector_store import create_vector_store
+    with startup_timer.phase("connect_vector_store"):
+        vector_store = create_vector_store(settings, EMBEDDING_DIM)
+    if vector_store.is_local and settings.snapshot_dir:
+        from .snapshot import CollectionSnapshotter
+
+        with startup_timer.phase("restore_snapshot"):
+            snapshotter = CollectionSnapshotter(vector_store, settings.snapshot_dir)
+            snapshotter.restore()
+    with startup_timer.phase("init_embeddings_service"):
+        service = EmbeddingsService(settings, vector_store=vector_store)
+    with startup_timer.phase("warmup_embeddings"):
+        service.warmup()
+
+    with startup_timer.phase("import_rag_service"):
+        from .rag_service import RAGService
+    with startup_timer.phase("init_rag_service"):
+        rag = RAGService(settings, service)
+
+    embeddings_service, rag_service = service, rag
+
+async def _warm_up(settings):
+    try:
+        await asyncio.to_thread(_initialize_services, settings)
+        startup_timer.mark_ready()
+        logger.info(f"Services initialized successfully: {startup_timer.phases}")
+    except Exception as e:
+        startup_timer.mark_failed(e)
+        logger.error(f"Service initialization failed: {e}", exc_info=True)
+
+async def _snapshot_periodically(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        if snapshotter is None:
+            continue
+        try:
+            await asyncio.to_thread(snapshotter.save_if_changed)
+        except Exception as e:
+            logger.error(f"Periodic snapshot failed: {e}")
+
+def _require_services():
+    if startup_timer.status != "ready":
+        raise HTTPException(status_code=503, detail=f"Service is {startup_timer.status}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    global embeddings_service, rag_service
+    # Startup: serve liveness immediately, load models in the background
     settings = get_settings()
-    
-    logger.info("Initializing services...")
-    embeddings_service = EmbeddingsService(settings)
-    rag_service = RAGService(settings, embeddings_service)
-    logger.info("Services initialized successfully")
+    logger.info("Initializing services in the background...")
+    warmup_task = asyncio.create_task(_warm_up(settings))
+    snapshot_task = None
+    if settings.snapshot_interval_seconds > 0:
+        snapshot_task = asyncio.create_task(
+            _snapshot_periodically(settings.snapshot_interval_seconds)
+        )
     
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    warmup_task.cancel()
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+    if snapshotter is not None:
+        try:
+            await asyncio.to_thread(snapshotter.save_if_changed)
+        except Exception as e:
+            logger.error(f"Snapshot on shutdown failed: {e}")
+    if embeddings_service is not None:
+        embeddings_service.batcher.close()
+        embeddings_service.embeddings.close()
+        await embeddings_service.vector_store.aclose()
 
 app = FastAPI(
     title="E-Learning RAG API",
@@ -62,49 +129,30 @@ async def root():
 async def health():
     return {"status": "healthy", "message": "API is working"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once models are loaded, 503 while warming up or failed"""
+    status_code = 200 if startup_timer.status == "ready" else 503
+    return JSONResponse(status_code=status_code, content=startup_timer.report())
+
 @app.post("/api/index-course")
 async def index_course(course: CourseDocument):
     """Index a course in the vector database"""
+    _require_services()
     try:
-        settings = get_settings()  # ← ADD THIS LINE
         logger.info(f"Indexing course: {course.title} (ID: {course.course_id})")
         
-        # Split content
-        docs = embeddings_service.text_splitter.split_text(course.content)
-        logger.info(f"Split into {len(docs)} chunks")
-        
-        # Create metadata with both structures for compatibility
-        metadatas = []
-        for i, doc in enumerate(docs):
-            metadatas.append({
-                "course_id": course.course_id,
-                "metadata": {
-                    "course_id": course.course_id
-                },
-                "title": course.title,
-                "instructor": course.instructor,
-                "category": course.category,
-                "level": course.level,
-                "chunk_index": i
-            })
-        
-        # Index to Qdrant
-        vector_store = Qdrant(
-            client=embeddings_service.client,
-            collection_name=settings.collection_name,  # Now settings is defined
-            embeddings=embeddings_service.embeddings,
-        )
-        
-        vector_store.add_texts(
-            texts=docs,
-            metadatas=metadatas
-        )
+        # Idempotent: only new or edited chunks are written, stale ones deleted
+        stats = await embeddings_service.aindex_document(course)
+        logger.info(f"Split into {stats['chunks']} chunks")
         
         logger.info(f"✅ Successfully indexed course {course.course_id}")
         
         return {
             "message": f"Successfully indexed course: {course.title}",
-            "chunks": len(docs),
+            "chunks": stats["chunks"],
+            "upserted": stats["upserted"],
+            "deleted": stats["deleted"],
             "course_id": course.course_id
         }
         
@@ -113,53 +161,153 @@ async def index_course(course: CourseDocument):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/index-courses")
+async def index_courses(request: Request):
+    """Index many courses from an NDJSON or JSON-array body of CourseDocuments, read as a stream"""
+    _require_services()
+    from .ingest import BatchIngestor, aiter_json_values
+
+    try:
+        ingestor = BatchIngestor(embeddings_service, batch_size=get_settings().ingest_batch_size)
+        return await ingestor.ingest(aiter_json_values(request.stream()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Error indexing courses: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage):
     """Chat with the RAG assistant"""
+    _require_services()
     try:
         logger.info(f"Received chat message: {message.message}")
         result = await rag_service.chat(
             message=message.message,
             course_id=message.course_id,
-            conversation_id=message.conversation_id
+            conversation_id=message.conversation_id,
+            retrieval_mode=message.retrieval_mode,
         )
         return ChatResponse(**result)
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error in chat: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """Chat with the RAG assistant over Server-Sent Events.
+
+    Events: "sources" (sent before generation starts), one "token" per
+    streamed chunk, then "done" with the full response and metrics
+    (including time to first token), or "error".
+    """
+    _require_services()
+
+    async def events():
+        try:
+            async for event, data in rag_service.chat_stream(
+                message=message.message,
+                course_id=message.course_id,
+                conversation_id=message.conversation_id,
+                retrieval_mode=message.retrieval_mode,
+            ):
+                yield _sse(event, data)
+        except LLMTimeoutError as e:
+            yield _sse("error", {"detail": str(e), "status": 504})
+        except Exception as e:
+            logger.error(f"Error in chat stream: {str(e)}", exc_info=True)
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/api/search", response_model=List[SearchResult])
 async def search_courses(query: SearchQuery):
     """Semantic search for courses"""
+    _require_services()
     try:
-        results = embeddings_service.search_similar(
+        # Grouped by course in the vector store, so top_k counts courses
+        results = await embeddings_service.asearch_courses(
             query=query.query,
             top_k=query.top_k,
-            filter_category=query.category
+            group_size=query.group_size,
+            filters={
+                "category": query.category,
+                "level": query.level,
+                "instructor": query.instructor,
+            },
+            mode=query.mode,
         )
         
         search_results = []
-        seen_courses = set()
-        
-        for doc, score in results:
-            course_id = doc.metadata['course_id']
-            if course_id not in seen_courses:
-                search_results.append(SearchResult(
-                    course_id=course_id,
-                    title=doc.metadata['title'],
-                    description=doc.page_content[:200],
-                    relevance_score=float(score)
-                ))
-                seen_courses.add(course_id)
+        for course_id, score, hits in results:
+            best_doc = hits[0][0]
+            search_results.append(SearchResult(
+                course_id=course_id,
+                title=best_doc.metadata['title'],
+                description=best_doc.page_content[:200],
+                relevance_score=float(score),
+                chunks=[
+                    ChunkMatch(
+                        chunk_index=doc.metadata.get('chunk_index'),
+                        start_index=doc.metadata.get('start_index'),
+                        score=float(chunk_score),
+                    )
+                    for doc, chunk_score in hits
+                ],
+            ))
         
         return search_results
     except Exception as e:
         logger.error(f"Error in search: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Embedding and answer cache sizes and hit/miss counters"""
+    _require_services()
+    stats = embeddings_service.cache_stats()
+    stats["answers"] = rag_service.answer_cache.stats() if rag_service.answer_cache else None
+    return stats
+
+@app.get("/api/llm/stats")
+async def llm_stats():
+    """In-flight, queued and timed-out LLM calls against the configured provider"""
+    _require_services()
+    return rag_service.llm_limiter.stats()
+
+@app.post("/api/admin/reindex")
+async def reindex_all(request: Optional[ReindexRequest] = None):
+    """Blue/green reindex: build a new collection version, validate it, swap the alias"""
+    _require_services()
+    from .reindex import BlueGreenReindexer, ReindexInProgressError, load_courses
+
+    settings = get_settings()
+    try:
+        reindexer = BlueGreenReindexer(embeddings_service, keep_versions=settings.reindex_keep_versions)
+        courses = request.courses if request and request.courses else load_courses(settings.courses_file)
+        # Runs on a worker thread; searches keep hitting the current version meanwhile
+        workers = request.workers if request else None
+        return await asyncio.to_thread(reindexer.run, courses, workers)
+    except ReindexInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in reindex: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.delete("/api/conversation/{conversation_id}")
 async def clear_conversation(conversation_id: str):
     """Clear conversation history"""
+    _require_services()
     try:
         rag_service.clear_conversation(conversation_id)
         return {"message": "Conversation cleared"}
@@ -0,0 +1,100 @@
+from langchain_core.documents import Document
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import hashlib
+import json
+import threading
+import uuid
+
+# Fixed namespace so the same chunk always maps to the same point id
+POINT_ID_NAMESPACE = uuid.UUID("5b0f3c2e-8d4a-4c1e-9f57-2a6d1e0b7c93")
+
+# chunk_index is part of the point id instead. start_index stays hashed: a chunk
+# that moves within the course text must be rewritten with its new offset.
+_UNHASHED_KEYS = {"chunk_index", "content_hash"}
+
+
+def chunk_hash(doc: Document) -> str:
+    """Hash of the chunk text and its metadata; any edit changes it"""
+    metadata = {k: v for k, v in doc.metadata.items() if k not in _UNHASHED_KEYS}
+    h = hashlib.sha256(doc.page_content.encode("utf-8"))
+    h.update(json.dumps(metadata, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def chunk_point_id(course_id: Any, chunk_index: int, content_hash: str) -> str:
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{course_id}:{chunk_index}:{content_hash}"))
+
+
+class CourseManifest:
+    """Point ids (and their chunk hashes) currently stored for each course.
+
+    Chunk point ids are derived from (course_id, chunk_index, content hash), so
+    reindexing a course only has to write chunks whose id is new and delete
+    ids that are no longer produced.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._courses: Dict[Any, Dict[str, str]] = {}
+        self._listeners: List[Callable[[Any], None]] = []
+
+    def subscribe(self, listener: Callable[[Any], None]):
+        """Call listener(course_id) whenever a course's stored chunks change;
+        course_id is None when the whole manifest was reloaded"""
+        self._listeners.append(listener)
+
+    def _notify(self, course_id: Any):
+        for listener in self._listeners:
+            listener(course_id)
+
+    def load(self, records: Iterable[Tuple[str, dict]]):
+        """Rebuild from (point_id, metadata) pairs already in the vector store"""
+        with self._lock:
+            self._courses.clear()
+            for point_id, metadata in records:
+                course_id = metadata.get("course_id")
+                if course_id is not None:
+                    self._courses.setdefault(course_id, {})[str(point_id)] = metadata.get("content_hash", "")
+        self._notify(None)
+
+    def load_course(self, course_id: Any, records: Iterable[Tuple[str, dict]]):
+        with self._lock:
+            self._courses[course_id] = {
+                str(point_id): metadata.get("content_hash", "") for point_id, metadata in records
+            }
+        self._notify(course_id)
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(len(points) for points in self._courses.values())
+
+    def stored_count(self, course_id: Any) -> int:
+        with self._lock:
+            return len(self._courses.get(course_id, {}))
+
+    @staticmethod
+    def assign_ids(docs: List[Document]) -> List[str]:
+        """Stamp each chunk with its content hash and deterministic point id (Document.id)"""
+        for i, doc in enumerate(docs):
+            content_hash = chunk_hash(doc)
+            doc.metadata["content_hash"] = content_hash
+            doc.id = chunk_point_id(doc.metadata.get("course_id"), doc.metadata.get("chunk_index", i), content_hash)
+        return [doc.id for doc in docs]
+
+    def diff(self, course_id: Any, ids: List[str]) -> Tuple[List[int], List[str]]:
+        """(positions of ids not stored yet, stored ids no longer produced)"""
+        with self._lock:
+            stored = self._courses.get(course_id, {})
+            wanted = set(ids)
+            changed = [i for i, point_id in enumerate(ids) if point_id not in stored]
+            stale = [point_id for point_id in stored if point_id not in wanted]
+        return changed, stale
+
+    def update(self, course_id: Any, docs: List[Document]):
+        """Record a course's chunks (already stamped by assign_ids) as stored"""
+        points = {doc.id: doc.metadata["content_hash"] for doc in docs}
+        with self._lock:
+            changed = self._courses.get(course_id) != points
+            self._courses[course_id] = points
+        if changed:
+            self._notify(course_id)
@@ -14,19 +14,46 @@ class ChatMessage(BaseModel):
     message: str
     course_id: Optional[int] = None
     conversation_id: Optional[str] = None
+    retrieval_mode: Optional[str] = None  # "dense" or "hybrid"; defaults to settings
+
+class ChatMetrics(BaseModel):
+    llm_calls: int
+    condensed: bool
+    cache_hit: bool = False  # answered from the semantic answer cache
+    cache_ms: Optional[float] = None
+    condense_ms: Optional[float] = None
+    retrieval_ms: Optional[float] = None  # None on cache hits
+    answer_ms: Optional[float] = None
+    ttft_ms: Optional[float] = None  # time to first token, streaming only
+    total_ms: float
 
 class ChatResponse(BaseModel):
     response: str
     sources: List[dict]
     conversation_id: str
+    metrics: Optional[ChatMetrics] = None
 
 class SearchQuery(BaseModel):
     query: str
-    top_k: int = 5
+    top_k: int = 5  # number of courses
+    group_size: int = 3  # matching chunks returned per course
     category: Optional[str] = None
+    level: Optional[str] = None
+    instructor: Optional[str] = None
+    mode: Optional[str] = None  # "dense" or "hybrid"; defaults to settings
+
+class ChunkMatch(BaseModel):
+    chunk_index: Optional[int] = None
+    start_index: Optional[int] = None
+    score: float  # cosine similarity ("dense"), or RRF score within the course ("hybrid")
 
 class SearchResult(BaseModel):
     course_id: int
     title: str
     description: str
-    relevance_score: float
+    relevance_score: float  # best chunk's cosine similarity ("dense"), or the course's RRF score ("hybrid")
+    chunks: List[ChunkMatch] = []
+
+class ReindexRequest(BaseModel):
+    courses: Optional[List[dict]] = None  # defaults to settings.courses_file
+    workers: Optional[int] = None  # embed in a process pool of this size
@@ -0,0 +1,355 @@
+from langchain_core.documents import Document
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import asyncio
+import json
+import logging
+import threading
+
+from .vector_store import CONTENT_KEY, METADATA_KEY, _point_ids
+
+logger = logging.getLogger(__name__)
+
+# Same shape as qdrant-client's Record, so snapshots treat both backends alike
+Record = namedtuple("Record", ["id", "vector", "payload"])
+
+_MISSING = object()
+
+
+class NumpyVectorStore:
+    """In-process vector index: one contiguous float32 matrix plus column storage.
+
+    A drop-in alternative to ``VectorStoreGateway`` for small and medium
+    catalogs. Rows are appended per upsert batch, so each course occupies a few
+    contiguous row ranges and a course-scoped search only multiplies those rows.
+    Other filters use boolean masks that are computed once per (field, value)
+    and reused until the next write. Top-k is a single ``argpartition``.
+
+    Deletes and replacing upserts only mark rows dead; once more than a quarter
+    of the rows are dead the live ones are copied into fresh storage, each
+    course in one contiguous range.
+    """
+
+    is_local = True
+    client = None
+    async_client = None
+
+    def __init__(self, settings, dim: int, initial_capacity: int = 1024):
+        self.settings = settings
+        self.collection_name = settings.collection_name
+        self.dim = dim
+        self.write_version = 0
+        self._lock = threading.RLock()
+
+        self._vectors = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._size = 0
+        self._ids: List[Any] = []
+        self._row_of: Dict[Any, int] = {}
+        self._contents: List[str] = []
+        self._columns: Dict[str, List[Any]] = {}
+        self._course_ranges: Dict[Any, List[Tuple[int, int]]] = {}
+        self._masks: Dict[Tuple[str, Any], np.ndarray] = {}
+        logger.info("Using in-process NumPy vector index")
+
+    # -- writes -------------------------------------------------------------
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        capacity = max(capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._vectors, self._alive = vectors, alive
+
+    def _append(self, ids: Sequence[Any], vectors, contents: Sequence[str], metadatas: Sequence[dict]):
+        rows = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        rows = rows / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._reserve(len(ids))
+            start = self._size
+            end = start + len(ids)
+            self._vectors[start:end] = rows
+            self._alive[start:end] = True
+
+            for offset, (point_id, content, metadata) in enumerate(zip(ids, contents, metadatas)):
+                row = start + offset
+                # Replaces an earlier row, including a duplicate id earlier in this batch
+                old_row = self._row_of.get(point_id)
+                if old_row is not None:
+                    self._alive[old_row] = False
+                self._ids.append(point_id)
+                self._row_of[point_id] = row
+                self._contents.append(content)
+                for column in self._columns.values():
+                    column.append(_MISSING)
+                for key, value in (metadata or {}).items():
+                    column = self._columns.get(key)
+                    if column is None:
+                        column = self._columns[key] = [_MISSING] * row + [_MISSING]
+                    column[row] = value
+                self._add_course_row(metadata.get("course_id") if metadata else None, row)
+
+            self._size = end
+            self._masks.clear()
+            self.write_version += 1
+
+    def _add_course_row(self, course_id, row: int):
+        ranges = self._course_ranges.setdefault(course_id, [])
+        if ranges and ranges[-1][1] == row:
+            ranges[-1] = (ranges[-1][0], row + 1)
+        else:
+            ranges.append((row, row + 1))
+
+    def upsert_documents(
+        self,
+        docs: Sequence[Document],
+        vectors: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        if not docs:
+            return []
+        ids = list(ids) if ids is not None else _point_ids(docs)
+        self._append(ids, vectors, [d.page_content for d in docs], [d.metadata for d in docs])
+        self._compact_if_sparse()
+        return ids
+
+    async def aupsert_documents(self, docs, vectors, ids=None) -> List[str]:
+        return await asyncio.to_thread(self.upsert_documents, docs, vectors, ids)
+
+    def delete_points(self, ids: Sequence[str]):
+        with self._lock:
+            deleted = 0
+            for point_id in ids:
+                row = self._row_of.pop(point_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                    deleted += 1
+            if deleted:
+                self._masks.clear()
+                self.write_version += 1
+                self._compact_if_sparse()
+
+    async def adelete_points(self, ids: Sequence[str]):
+        await asyncio.to_thread(self.delete_points, ids)
+
+    def _compact_if_sparse(self):
+        with self._lock:
+            if self._size - len(self._row_of) > self._size / 4:
+                self._compact()
+
+    def _compact(self):
+        """Copy live rows into new storage (readers holding the old lists keep a consistent view)"""
+        keep = [
+            row
+            for ranges in self._course_ranges.values()
+            for start, end in ranges
+            for row in range(start, end)
+            if self._alive[row]
+        ]
+        dead = self._size - len(keep)
+        rows = np.asarray(keep, dtype=np.int64)
+
+        self._vectors = np.array(self._vectors[rows], dtype=np.float32).reshape(len(keep), self.dim)
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._ids = [self._ids[row] for row in keep]
+        self._contents = [self._contents[row] for row in keep]
+        self._columns = {key: [column[row] for row in keep] for key, column in self._columns.items()}
+        self._row_of = {point_id: row for row, point_id in enumerate(self._ids)}
+        self._course_ranges = {}
+        course_ids = self._columns.get("course_id")
+        for row in range(len(keep)):
+            course_id = course_ids[row] if course_ids is not None else _MISSING
+            self._add_course_row(None if course_id is _MISSING else course_id, row)
+        self._size = len(keep)
+        self._masks.clear()
+        logger.info(f"Compacted NumPy index: dropped {dead} dead rows, {self._size} live")
+
+    def upsert_payloads(self, ids, vectors, payloads):
+        self._append(
+            list(ids),
+            vectors,
+            [(p or {}).get(CONTENT_KEY) or "" for p in payloads],
+            [(p or {}).get(METADATA_KEY) or {} for p in payloads],
+        )
+
+    # -- reads --------------------------------------------------------------
+
+    def _mask(self, field: str, value) -> np.ndarray:
+        key = (field, value)
+        mask = self._masks.get(key)
+        if mask is None:
+            column = self._columns.get(field)
+            if column is None:
+                mask = np.zeros(self._size, dtype=bool)
+            else:
+                mask = np.fromiter((v == value for v in column), dtype=bool, count=self._size)
+            mask &= self._alive[:self._size]
+            self._masks[key] = mask
+        return mask
+
+    def _candidate_rows(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Row numbers matching the filters, or None for "all live rows" """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        if not filters:
+            return None
+
+        course_id = filters.pop("course_id", None)
+        if course_id is not None:
+            ranges = self._course_ranges.get(course_id, [])
+            rows = np.concatenate([np.arange(s, e) for s, e in ranges]) if ranges else np.empty(0, dtype=np.int64)
+            rows = rows[self._alive[rows]]
+            for field, value in filters.items():
+                rows = rows[self._mask(field, value)[rows]]
+            return rows
+
+        mask = None
+        for field, value in filters.items():
+            field_mask = self._mask(field, value)
+            mask = field_mask if mask is None else mask & field_mask
+        return np.flatnonzero(mask)
+
+    def _document(self, row: int, view=None) -> Document:
+        ids, contents, columns = view or (self._ids, self._contents, self._columns)
+        metadata = {}
+        for key, column in columns.items():
+            value = column[row]
+            if value is not _MISSING:
+                metadata[key] = value
+        return Document(id=str(ids[row]), page_content=contents[row], metadata=metadata)
+
+    def search(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        query = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            rows = self._candidate_rows(filters)
+            if rows is None:
+                rows = np.flatnonzero(self._alive[:self._size])
+                scores = self._vectors[:self._size] @ query
+                scores = scores[rows]
+            else:
+                scores = self._vectors[rows] @ query
+
+            if len(rows) == 0:
+                return []
+            k = min(top_k, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._document(int(rows[i])), float(scores[i])) for i in top]
+
+    async def asearch(self, vector, top_k: int, filters=None) -> List[Tuple[Document, float]]:
+        return await asyncio.to_thread(self.search, vector, top_k, filters)
+
+    def search_groups(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        group_size: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Any, List[Tuple[Document, float]]]]:
+        """Best top_k courses, each with up to group_size of its chunks (best first)"""
+        query = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            rows = self._candidate_rows(filters)
+            if rows is None:
+                rows = np.flatnonzero(self._alive[:self._size])
+            if len(rows) == 0:
+                return []
+            scores = self._vectors[rows] @ query
+            course_ids = self._columns.get("course_id")
+
+            groups: Dict[Any, List[int]] = {}
+            full = 0
+            for i in np.argsort(-scores):
+                row = int(rows[i])
+                course_id = course_ids[row] if course_ids is not None else _MISSING
+                if course_id is _MISSING or course_id is None:
+                    continue
+                hits = groups.get(course_id)
+                if hits is None:
+                    if len(groups) == top_k:
+                        continue
+                    hits = groups[course_id] = []
+                if len(hits) < group_size:
+                    hits.append(i)
+                    if len(hits) == group_size:
+                        full += 1
+                        if full == top_k:
+                            break
+
+            return [
+                (course_id, [(self._document(int(rows[i])), float(scores[i])) for i in hits])
+                for course_id, hits in groups.items()
+            ]
+
+    async def asearch_groups(self, vector, top_k: int, group_size: int, filters=None):
+        return await asyncio.to_thread(self.search_groups, vector, top_k, group_size, filters)
+
+    def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        with self._lock:
+            rows = self._candidate_rows(filters)
+            return int(self._alive[:self._size].sum()) if rows is None else len(rows)
+
+    def iter_points(self, with_vectors: bool = True, batch_size: int = 256, filters=None):
+        with self._lock:
+            rows = self._candidate_rows(filters)
+            if rows is None:
+                rows = np.flatnonzero(self._alive[:self._size])
+            # Compaction swaps in new storage, so these row numbers stay valid here
+            view = (self._ids, self._contents, self._columns)
+            vectors = self._vectors
+        for row in rows:
+            doc = self._document(int(row), view)
+            yield Record(
+                id=view[0][row],
+                vector=vectors[row].tolist() if with_vectors else None,
+                payload={CONTENT_KEY: doc.page_content, METADATA_KEY: doc.metadata},
+            )
+
+    # -- snapshots ----------------------------------------------------------
+
+    def payload_schema(self) -> Dict[str, str]:
+        return {}
+
+    def create_payload_index(self, field_name: str, schema: str):
+        """Masks are built on demand, so there is nothing to create"""
+
+    def load_snapshot(self, directory: Path) -> int:
+        """Adopt a snapshot's vectors.npy as the matrix, memory-mapped copy-on-write"""
+        with open(directory / "ids.json", "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        vectors = np.load(directory / "vectors.npy", mmap_mode="c")
+        with open(directory / "payloads.jsonl", "r", encoding="utf-8") as f:
+            payloads = [json.loads(line) for line in f]
+
+        with self._lock:
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            self._alive = np.zeros(0, dtype=bool)
+            self._size = 0
+            self._ids, self._row_of, self._contents = [], {}, []
+            self._columns, self._course_ranges = {}, {}
+            self.upsert_payloads(ids, np.zeros((len(ids), self.dim), dtype=np.float32), payloads)
+            # Swap the mapped matrix in: later writes land in private copy-on-write
+            # pages, and growing it copies the rows into RAM
+            self._vectors = vectors
+        return len(ids)
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
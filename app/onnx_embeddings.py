@@ -0,0 +1,123 @@
+from langchain_core.embeddings import Embeddings
+from pathlib import Path
+from typing import List
+import numpy as np
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxEmbeddings(Embeddings):
+    """bge-small-en-v1.5 served through ONNX Runtime on CPU.
+
+    The model is exported to ONNX once (and optionally int8-quantized) into
+    ``cache_dir``; later starts load the cached artifact directly. Output
+    matches the sentence-transformers pipeline: CLS pooling, L2-normalized.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: str,
+        quantize: bool = True,
+        max_length: int = 512,
+        batch_size: int = 32,
+    ):
+        from transformers import AutoTokenizer
+        import onnxruntime as ort
+
+        self.model_name = model_name
+        self.cache_dir = Path(cache_dir) / model_name.replace("/", "__")
+        self.quantize = quantize
+        self.max_length = max_length
+        self.batch_size = batch_size
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model_path = self._ensure_model()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"Loaded ONNX embedding model: {model_path}")
+
+    def _ensure_model(self) -> Path:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fp32_path = self.cache_dir / "model.onnx"
+        int8_path = self.cache_dir / "model.int8.onnx"
+
+        if not fp32_path.exists():
+            self._export(fp32_path)
+
+        if not self.quantize:
+            return fp32_path
+
+        if not int8_path.exists():
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info(f"Quantizing {fp32_path.name} to int8...")
+            tmp_path = int8_path.with_suffix(".tmp")
+            quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+        return int8_path
+
+    def _export(self, path: Path):
+        import torch
+        from transformers import AutoModel
+
+        logger.info(f"Exporting {self.model_name} to ONNX (one-time)...")
+        model = AutoModel.from_pretrained(self.model_name)
+        model.eval()
+
+        dummy = self.tokenizer(["export probe"], return_tensors="pt")
+        tmp_path = path.with_suffix(".tmp")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+                str(tmp_path),
+                input_names=["input_ids", "attention_mask", "token_type_ids"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "token_type_ids": {0: "batch", 1: "sequence"},
+                    "last_hidden_state": {0: "batch", 1: "sequence"},
+                },
+                opset_version=14,
+                dynamo=False,
+            )
+        os.replace(tmp_path, path)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            encoded = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feeds = {
+                name: array.astype(np.int64)
+                for name, array in encoded.items()
+                if name in self._input_names
+            }
+            hidden = self.session.run(None, feeds)[0]
+
+            # CLS pooling + L2 normalization, as configured for bge models
+            cls = hidden[:, 0]
+            cls = cls / np.linalg.norm(cls, axis=1, keepdims=True)
+            vectors.extend(cls.astype(np.float32).tolist())
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
@@ -1,22 +1,32 @@
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
-
+# Provider SDKs are imported lazily: only the configured llm_provider is ever loaded.
 # Optional (recommended) migrations to remove deprecations:
 # from langchain_perplexity import ChatPerplexity
-# from langchain_qdrant import Qdrant
 
-from langchain_community.chat_models import ChatPerplexity
-from langchain.chains import ConversationalRetrievalChain
 from langchain.memory import ConversationBufferMemory
-from langchain_community.vectorstores import Qdrant
 from langchain.prompts import PromptTemplate
-from qdrant_client.models import Filter, FieldCondition, MatchValue
+from langchain_core.output_parsers import StrOutputParser
 
+import json
+import time
 import uuid
 import logging
 
+from .answer_cache import SemanticAnswerCache
+from .chat_tracing import SampledPromptTracer
+from .condense import should_condense
+from .llm_limits import ProviderLimiter
+
 logger = logging.getLogger(__name__)
 
+_ROLE_PREFIX = {"human": "Human: ", "ai": "Assistant: "}
+
+
+def format_chat_history(messages) -> str:
+    """Chat history as "Human: ... / Assistant: ..." lines, as ConversationalRetrievalChain rendered it"""
+    return "".join(
+        f"\n{_ROLE_PREFIX.get(m.type, f'{m.type}: ')}{m.content}" for m in messages if m.content
+    )
+
 
 class RAGService:
     def __init__(self, settings, embeddings_service):
@@ -25,6 +35,10 @@ class RAGService:
 
         # Initialize LLM based on provider
         self.llm = self._initialize_llm()
+        # Optional smaller model for rewriting follow-up questions
+        self.condense_llm = self.llm
+        if settings.condense_llm_model:
+            self.condense_llm = self._initialize_llm(settings.condense_llm_model)
 
         # Store conversations (memory per conversation id)
         self.conversations = {}
@@ -48,31 +62,75 @@ Question: {question}
 
 Answer:"""
 
-    def _initialize_llm(self):
-        """Initialize LLM based on provider setting"""
+        # Rewrites a follow-up into a standalone question before retrieval
+        self.condense_template = """Given the following conversation and a follow up question, rephrase the follow up question to be a standalone question, in its original language.
+
+Chat History:
+{chat_history}
+Follow Up Input: {question}
+Standalone question:"""
+
+        # Built once and shared by every turn; requests only supply the inputs
+        # (question, history, context) and per-turn callbacks
+        self.qa_prompt = PromptTemplate(
+            template=self.prompt_template,
+            input_variables=["context", "chat_history", "question"],
+        )
+        self.condense_prompt = PromptTemplate.from_template(self.condense_template)
+        self.answer_chain = self.qa_prompt | self.llm | StrOutputParser()
+        self.condense_chain = self.condense_prompt | self.condense_llm | StrOutputParser()
+        self.tracer = SampledPromptTracer(settings.rag_trace_sample_rate)
+        # Shared by the answer and condense models: both count against the provider's limits
+        self.llm_limiter = ProviderLimiter(
+            settings.llm_provider.lower(), settings.llm_max_concurrency, settings.llm_timeout_seconds
+        )
+
+        # Reuses answers to near-identical first-turn questions within a course;
+        # a reindexed course drops its answers
+        self.answer_cache = None
+        if settings.answer_cache_max_entries > 0:
+            self.answer_cache = SemanticAnswerCache(
+                settings.answer_cache_max_entries,
+                settings.answer_cache_ttl_seconds,
+                settings.answer_cache_threshold,
+            )
+            embeddings_service.manifest.subscribe(self.answer_cache.invalidate)
+
+    def _initialize_llm(self, model: str = None):
+        """Initialize LLM based on provider setting (model defaults to llm_model)"""
         provider = self.settings.llm_provider.lower()
+        model = model or self.settings.llm_model
 
         if provider == "perplexity":
-            logger.info(f"Initializing Perplexity LLM: {self.settings.llm_model}")
+            from langchain_community.chat_models import ChatPerplexity
+
+            logger.info(f"Initializing Perplexity LLM: {model}")
             return ChatPerplexity(
-                model=self.settings.llm_model,
+                model=model,
                 temperature=0.0,  # Changed from 0.2
+                request_timeout=self.settings.llm_timeout_seconds,
                 pplx_api_key=self.settings.perplexity_api_key,
                 max_tokens=150,  # Reduced from 512 for conciseness
             )
         elif provider == "groq":
-            logger.info(f"Initializing Groq LLM: {self.settings.llm_model}")
+            from langchain_groq import ChatGroq
+
+            logger.info(f"Initializing Groq LLM: {model}")
             return ChatGroq(
-                model=self.settings.llm_model,
+                model=model,
                 groq_api_key=self.settings.groq_api_key,
                 temperature=0.0,  # Changed from 0.7
+                request_timeout=self.settings.llm_timeout_seconds,
             )
         else:  # default to openai
-            logger.info(f"Initializing OpenAI LLM: {self.settings.llm_model}")
+            from langchain_openai import ChatOpenAI
+
+            logger.info(f"Initializing OpenAI LLM: {model}")
             return ChatOpenAI(
-                model=self.settings.llm_model,
+                model=model,
                 openai_api_key=self.settings.openai_api_key,
                 temperature=0.0,  # Changed from 0.7
+                request_timeout=self.settings.llm_timeout_seconds,
             )
 
     def get_or_create_conversation(self, conversation_id: str = None):
@@ -90,96 +148,160 @@ Answer:"""
 
         return conversation_id, self.conversations[conversation_id]
 
-    async def chat(
-        self,
-        message: str,
-        course_id: int = None,
-        conversation_id: str = None,
-    ):
-        """Chat with RAG system"""
+    async def _prepare_turn(self, message, course_id, conversation_id, retrieval_mode) -> "_ChatTurn":
+        """Everything before the answer: memory, condensation, the turn's only retrieval"""
         logger.info(
             f"Chat request - message: '{message}', course_id: {course_id}"
         )
 
+        turn = _ChatTurn(message, retrieval_mode or self.settings.retrieval_mode)
         # Get or create conversation memory
-        conversation_id, memory = self.get_or_create_conversation(conversation_id)
-
-        # Vector store
-        vector_store = Qdrant(
-            client=self.embeddings_service.client,
-            collection_name=self.settings.collection_name,
-            embeddings=self.embeddings_service.embeddings,
-        )
-
-        # Build retriever and filter
-        search_kwargs = {"k": self.settings.top_k_results}
+        turn.conversation_id, turn.memory = self.get_or_create_conversation(conversation_id)
+        history = turn.memory.chat_memory.messages
+        turn.chat_history = format_chat_history(history)
 
         if course_id:
-            # use nested metadata path
-            filter_key = "metadata.course_id"
-            search_kwargs["filter"] = Filter(
-                must=[
-                    FieldCondition(
-                        key=filter_key,
-                        match=MatchValue(value=course_id),
-                    )
-                ]
-            )
-            logger.info(f"Applying filter for course_id: {course_id} on key '{filter_key}'")
-
-        retriever = vector_store.as_retriever(search_kwargs=search_kwargs)
-
-        # DEBUG: test retrieval before running the chain
-        try:
-            test_docs = retriever.invoke(message)
-            logger.info(f"Retriever found {len(test_docs)} documents")
-            if test_docs:
-                logger.info(f"Sample doc metadata: {test_docs[0].metadata}")
-            else:
-                logger.warning("No documents found by retriever")
-                logger.warning(f"Filter used: {search_kwargs.get('filter')}")
-        except Exception as e:
-            logger.error(f"Retriever test failed: {e}")
-
-        # Custom prompt
-        QA_PROMPT = PromptTemplate(
-            template=self.prompt_template,
-            input_variables=["context", "chat_history", "question"],
+            # matched against the nested metadata.course_id path
+            turn.filters = {"course_id": course_id}
+
+        turn.config = {"callbacks": self.tracer.callbacks()}
+        if not history and self.answer_cache is not None:
+            # Only history-free questions mean the same thing in every conversation
+            start = time.perf_counter()
+            turn.cache_key = (course_id or None, turn.mode)
+            turn.query_vector = await self.embeddings_service.embeddings.aembed_query(message)
+            hit = self.answer_cache.get(turn.cache_key, turn.query_vector)
+            turn.timings["cache_ms"] = (time.perf_counter() - start) * 1000
+            if hit is not None:
+                turn.cached_answer, turn.results, similarity = hit
+                logger.info(f"Answer cache hit (similarity {similarity:.3f})")
+                return turn
+
+        turn.condensed = should_condense(self.settings.condense_mode, message, bool(history))
+        if turn.condensed:
+            start = time.perf_counter()
+            rewritten = await self.llm_limiter.call(lambda: self.condense_chain.ainvoke(
+                {"chat_history": turn.chat_history, "question": message}, turn.config
+            ))
+            turn.question = rewritten.strip() or message
+            turn.timings["condense_ms"] = (time.perf_counter() - start) * 1000
+
+        # The only retrieval of the turn: its documents are both the prompt
+        # context and the response sources
+        start = time.perf_counter()
+        turn.results = await self.embeddings_service.asearch_similar(
+            turn.question, self.settings.top_k_results, turn.filters, retrieval_mode
         )
+        turn.timings["retrieval_ms"] = (time.perf_counter() - start) * 1000
+        if not turn.results:
+            logger.warning(f"No documents retrieved for filter {turn.filters}")
+        return turn
 
-        # Chain with custom prompt
-        qa_chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=retriever,
-            memory=memory,
-            return_source_documents=True,
-            verbose=True,
-            combine_docs_chain_kwargs={"prompt": QA_PROMPT},
-        )
+    def _answer_inputs(self, turn: "_ChatTurn") -> dict:
+        return {
+            "context": "\n\n".join(doc.page_content for doc, _ in turn.results),
+            "chat_history": turn.chat_history,
+            "question": turn.question,
+        }
 
-        # Use invoke (removes deprecation warning)
-        result = qa_chain.invoke({"question": message})
-
-        # Extract sources
-        sources = []
-        source_docs = result.get("source_documents", [])
-        logger.info(f"QA chain returned {len(source_docs)} source documents")
-
-        for doc in source_docs:
-            sources.append(
-                {
-                    "course_id": doc.metadata.get("course_id"),
-                    "title": doc.metadata.get("title"),
-                    "content": (doc.page_content[:200] + "...")
-                    if doc.page_content
-                    else "",
-                }
+    def _finish_turn(self, turn: "_ChatTurn", answer: str) -> dict:
+        """Save the exchange to memory (and new first-turn answers to the cache); returns the turn metrics"""
+        turn.memory.save_context({"question": turn.message}, {"answer": answer})
+        cache_hit = turn.cached_answer is not None
+        if turn.query_vector is not None and not cache_hit:
+            self.answer_cache.put(turn.cache_key, turn.query_vector, answer, turn.results)
+
+        metrics = {
+            "llm_calls": 0 if cache_hit else 2 if turn.condensed else 1,
+            "condensed": turn.condensed,
+            "cache_hit": cache_hit,
+            **{name: round(ms, 1) for name, ms in turn.timings.items()},
+            "total_ms": round((time.perf_counter() - turn.start) * 1000, 1),
+        }
+        first_token = f", first token {metrics['ttft_ms']}ms" if "ttft_ms" in metrics else ""
+        logger.info(f"Chat turn: {metrics['llm_calls']} LLM call(s), {metrics['total_ms']}ms{first_token}")
+
+        if self.settings.rag_debug:
+            logger.info("RAG debug: " + json.dumps({
+                "conversation_id": turn.conversation_id,
+                "message": turn.message,
+                "question": turn.question,
+                "filters": turn.filters,
+                "mode": turn.mode,
+                "hits": [
+                    {
+                        "course_id": doc.metadata.get("course_id"),
+                        "chunk_index": doc.metadata.get("chunk_index"),
+                        "score": round(score, 4),
+                    }
+                    for doc, score in turn.results
+                ],
+                "metrics": metrics,
+            }, default=str))
+        return metrics
+
+    async def chat(
+        self,
+        message: str,
+        course_id: int = None,
+        conversation_id: str = None,
+        retrieval_mode: str = None,
+    ):
+        """Chat with RAG system: condense (when needed), retrieve once, answer"""
+        turn = await self._prepare_turn(message, course_id, conversation_id, retrieval_mode)
+
+        answer = turn.cached_answer
+        if answer is None:
+            start = time.perf_counter()
+            answer = await self.llm_limiter.call(
+                lambda: self.answer_chain.ainvoke(self._answer_inputs(turn), turn.config)
             )
+            turn.timings["answer_ms"] = (time.perf_counter() - start) * 1000
 
         return {
-            "response": result["answer"],
-            "sources": sources,
-            "conversation_id": conversation_id,
+            "response": answer,
+            "sources": turn.sources(),
+            "conversation_id": turn.conversation_id,
+            "metrics": self._finish_turn(turn, answer),
+        }
+
+    async def chat_stream(
+        self,
+        message: str,
+        course_id: int = None,
+        conversation_id: str = None,
+        retrieval_mode: str = None,
+    ):
+        """Like chat, but yields ("sources" | "token" | "done", data) events as the answer streams.
+
+        Sources go out before the LLM starts; memory is saved only once the
+        whole answer has arrived, so an aborted stream leaves no half turn.
+        """
+        turn = await self._prepare_turn(message, course_id, conversation_id, retrieval_mode)
+        yield "sources", {"conversation_id": turn.conversation_id, "sources": turn.sources()}
+
+        start = time.perf_counter()
+        parts = []
+        if turn.cached_answer is not None:
+            tokens = _single(turn.cached_answer)
+        else:
+            tokens = self.llm_limiter.stream(
+                lambda: self.answer_chain.astream(self._answer_inputs(turn), turn.config)
+            )
+        async for token in tokens:
+            if not parts:
+                # Time to first token, measured from the start of the turn
+                turn.timings["ttft_ms"] = (time.perf_counter() - turn.start) * 1000
+            parts.append(token)
+            yield "token", token
+        if turn.cached_answer is None:
+            turn.timings["answer_ms"] = (time.perf_counter() - start) * 1000
+
+        answer = "".join(parts)
+        yield "done", {
+            "response": answer,
+            "conversation_id": turn.conversation_id,
+            "metrics": self._finish_turn(turn, answer),
         }
 
     def clear_conversation(self, conversation_id: str):
@@ -187,3 +309,40 @@ Answer:"""
         if conversation_id in self.conversations:
             del self.conversations[conversation_id]
             logger.info(f"Cleared conversation: {conversation_id}")
+
+
+async def _single(text: str):
+    yield text
+
+
+class _ChatTurn:
+    """State of one chat turn between its preparation and its answer"""
+
+    def __init__(self, message: str, mode: str):
+        self.message = message
+        self.question = message
+        self.mode = mode
+        self.start = time.perf_counter()
+        self.timings = {}
+        self.filters = None
+        self.condensed = False
+        self.results = []
+        self.conversation_id = None
+        self.memory = None
+        self.chat_history = ""
+        self.config = {}
+        self.cache_key = None
+        self.query_vector = None
+        self.cached_answer = None
+
+    def sources(self) -> list:
+        return [
+            {
+                "course_id": doc.metadata.get("course_id"),
+                "title": doc.metadata.get("title"),
+                "content": (doc.page_content[:200] + "...")
+                if doc.page_content
+                else "",
+            }
+            for doc, _ in self.results
+        ]
@@ -0,0 +1,169 @@
+from typing import List, Optional
+import json
+import logging
+import threading
+import time
+
+from .vector_store import VectorStoreGateway, versioned_name
+
+logger = logging.getLogger(__name__)
+
+
+class ReindexInProgressError(RuntimeError):
+    pass
+
+
+class ReindexValidationError(RuntimeError):
+    pass
+
+
+def load_courses(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["courses"] if isinstance(data, dict) else data
+
+
+class BlueGreenReindexer:
+    """Rebuilds the collection as ``<name>_vN`` beside the live one, then swaps the alias.
+
+    ``settings.collection_name`` is an alias. Readers keep resolving it to the
+    old version until the new one is fully written and validated (point count
+    and a probe query), so they never see an empty or half-built index. Writes
+    that reach the live collection during a rebuild are not carried over; the
+    rebuild reads from the course source.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, embeddings_service, keep_versions: int = 1):
+        self.service = embeddings_service
+        self.gateway = embeddings_service.vector_store
+        # Previous versions kept after a swap (for rollback); older ones are dropped
+        self.keep_versions = keep_versions
+        if not isinstance(self.gateway, VectorStoreGateway):
+            raise RuntimeError("Blue/green reindexing needs the Qdrant backend (vector_backend=qdrant)")
+
+    def run(self, courses: List[dict], workers: Optional[int] = None) -> dict:
+        if not self._lock.acquire(blocking=False):
+            raise ReindexInProgressError("A reindex is already running")
+        try:
+            return self._run(courses, workers)
+        finally:
+            self._lock.release()
+
+    def _run(self, courses: List[dict], workers: Optional[int]) -> dict:
+        start = time.perf_counter()
+        versions = self.gateway.collection_versions()
+        version = versions[-1][0] + 1 if versions else 1
+        staging = self.gateway.for_collection(versioned_name(self.gateway.collection_name, version))
+        staging.create_collection()
+
+        try:
+            docs = []
+            for course in courses:
+                course_docs = self.service._split_course_to_docs(course)
+                self.service.manifest.assign_ids(course_docs)
+                docs += course_docs
+            self._write(staging, docs, workers)
+            self._validate(staging, docs, courses)
+        except Exception:
+            logger.error(f"Reindex into {staging.collection_name} failed, dropping it")
+            staging.drop_collection(staging.collection_name)
+            raise
+
+        previous = self.gateway.alias_target()
+        if previous is None:
+            # A plain collection predates versioning: it has to go before the alias
+            # can take its name, which leaves a brief gap on this first swap only
+            logger.warning(f"Replacing unversioned collection {self.gateway.collection_name} with an alias")
+            self.gateway.drop_collection(self.gateway.collection_name)
+        self.gateway.swap_alias(staging.collection_name)
+        self.service.reload_from_store()
+        dropped = self._collect_garbage(staging.collection_name)
+
+        stats = {
+            "collection": staging.collection_name,
+            "previous": previous,
+            "courses": len(courses),
+            "points": len(docs),
+            "dropped": dropped,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        logger.info(f"Blue/green reindex finished: {stats}")
+        return stats
+
+    def _write(self, staging, docs, workers: Optional[int]):
+        if workers:
+            from .bulk_indexer import BulkIndexer
+            from .embeddings_service import EMBEDDING_DIM
+
+            settings = self.service.settings
+            BulkIndexer(
+                settings, staging.upsert_documents, self.service.embeddings, EMBEDDING_DIM,
+                workers=workers, batch_size=settings.bulk_index_batch_size,
+            ).index_documents(docs)
+            return
+
+        batch_size = self.service.settings.bulk_index_batch_size
+        for offset in range(0, len(docs), batch_size):
+            batch = docs[offset:offset + batch_size]
+            vectors = self.service.embeddings.embed_documents([doc.page_content for doc in batch])
+            staging.upsert_documents(batch, vectors)
+
+    def _validate(self, staging, docs, courses: List[dict]):
+        count = staging.count()
+        if count != len(docs):
+            raise ReindexValidationError(f"{staging.collection_name} has {count} points, expected {len(docs)}")
+
+        # Probe: a course's own title should find one of its chunks
+        probe = next((c for c in courses if c.get("title")), None)
+        if probe is None:
+            return
+        vector = self.service.embeddings.embed_query(probe["title"])
+        hits = staging.search(vector, self.service.settings.top_k_results)
+        if not any(doc.metadata.get("course_id") == probe.get("id") for doc, _ in hits):
+            raise ReindexValidationError(f"Probe query {probe['title']!r} did not find its course")
+
+    def _collect_garbage(self, current: str) -> List[str]:
+        older = [name for _, name in self.gateway.collection_versions() if name != current]
+        doomed = older[:max(len(older) - self.keep_versions, 0)]
+        for name in doomed:
+            self.gateway.drop_collection(name)
+        return doomed
+
+
+if __name__ == "__main__":
+    # python -m app.reindex [courses.json] [--workers N]  (against the configured qdrant_url)
+    import argparse
+
+    import sys
+
+    from .config import get_settings
+    from .embeddings_service import EMBEDDING_DIM, EmbeddingsService
+    from .vector_store import create_vector_store
+
+    parser = argparse.ArgumentParser(description="Blue/green reindex with an alias swap")
+    parser.add_argument("courses", nargs="?", default=None)
+    parser.add_argument("--workers", type=int, default=None, help="embed in a process pool of this size")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    vector_store = create_vector_store(settings, EMBEDDING_DIM)
+    snapshotter = None
+    if vector_store.is_local:
+        # An in-memory store only outlives this process through its snapshot
+        if not settings.snapshot_dir:
+            sys.exit("Refusing to reindex an in-memory store with no snapshot_dir: "
+                     "the new version would be lost on exit. Set QDRANT_URL or SNAPSHOT_DIR.")
+        from .snapshot import CollectionSnapshotter
+
+        snapshotter = CollectionSnapshotter(vector_store, settings.snapshot_dir)
+        snapshotter.restore()
+
+    service = EmbeddingsService(settings, vector_store=vector_store)
+    reindexer = BlueGreenReindexer(service, keep_versions=settings.reindex_keep_versions)
+    print(reindexer.run(load_courses(args.courses or settings.courses_file), workers=args.workers))
+    if snapshotter is not None:
+        # Saved under the alias name, so it holds whichever version is now live
+        snapshotter.save_if_changed()
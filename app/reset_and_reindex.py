@@ -1,98 +1,84 @@
 import requests
-from qdrant_client import QdrantClient
-from dotenv import load_dotenv
-import os
 import time
 import sys
 
-load_dotenv()
-
-QDRANT_URL = os.getenv('QDRANT_URL')
-QDRANT_API_KEY = os.getenv('QDRANT_API_KEY')
-COLLECTION_NAME = 'elearning_courses'
 API_URL = "http://localhost:8000/api"
 
 
 def check_backend():
-    """Check if backend is running"""
+    """Wait until the backend is ready: /health answers before the models are loaded"""
     try:
-        response = requests.get("http://localhost:8000/health", timeout=5)
-        return response.status_code == 200
-    except:
+        from index_all_courses import wait_until_ready
+    except ImportError:
+        print("❌ Cannot import index_all_courses.py")
+        print("   Make sure the file exists in the same directory\n")
         return False
+    return wait_until_ready()
+
 
+def blue_green_reindex(courses=None):
+    """Rebuild into a new collection version and swap the alias (no empty window).
 
-def delete_collection():
-    """Delete the old collection"""
-    print("🗑️  Deleting old collection...")
+    Without ``courses`` the backend rebuilds from its own courses_file.
+    """
+    print("🔵🟢 Running blue/green reindex on the backend...")
     try:
-        client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
-        client.delete_collection(COLLECTION_NAME)
-        print("✅ Old collection deleted\n")
-        time.sleep(2)
-        return True
+        response = requests.post(
+            f"{API_URL}/admin/reindex",
+            json={"courses": courses} if courses else None,
+            timeout=600,
+        )
+        if response.status_code == 200:
+            stats = response.json()
+            print(f"✅ Now serving {stats['collection']} ({stats['points']} points, {stats['seconds']}s)")
+            if stats["dropped"]:
+                print(f"🗑️  Dropped old versions: {', '.join(stats['dropped'])}")
+            return True
+        print(f"❌ Reindex failed ({response.status_code}): {response.text}")
+        return False
     except Exception as e:
-        print(f"⚠️  Collection may not exist: {e}\n")
+        print(f"❌ Reindex failed: {e}")
         return False
 
 
-def recreate_collection():
-    """Manually recreate the collection"""
-    print("🔧 Recreating collection...")
+def reset_collection():
+    """Rebuild the collection from scratch out of this script's course catalog.
+
+    The collection name is an alias to a versioned collection, so the reset
+    is a blue/green rebuild: the old version (and its stale points) is
+    replaced by a freshly built one and garbage-collected by the backend.
+    """
     try:
-        from qdrant_client.models import Distance, VectorParams, PayloadSchemaType
-        
-        client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
-        
-        # Create collection
-        client.recreate_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(
-                size=384,  # bge-small-en-v1.5 dimension
-                distance=Distance.COSINE,
-            ),
-        )
-        print(f"✅ Created collection: {COLLECTION_NAME}")
-        
-        # Create indexes
-        try:
-            client.create_payload_index(
-                collection_name=COLLECTION_NAME,
-                field_name="course_id",
-                field_schema=PayloadSchemaType.INTEGER,
-            )
-            print("✅ Created index for course_id")
-        except Exception as e:
-            print(f"⚠️  Index course_id: {e}")
-        
-        try:
-            client.create_payload_index(
-                collection_name=COLLECTION_NAME,
-                field_name="metadata.course_id",
-                field_schema=PayloadSchemaType.INTEGER,
-            )
-            print("✅ Created index for metadata.course_id\n")
-        except Exception as e:
-            print(f"⚠️  Index metadata.course_id: {e}\n")
-        
-        return True
-    except Exception as e:
-        print(f"❌ Failed to recreate collection: {e}\n")
+        from index_all_courses import COURSES
+    except ImportError:
+        print("❌ Cannot import index_all_courses.py")
+        print("   Make sure the file exists in the same directory\n")
         return False
+    return blue_green_reindex(COURSES)
 
 
-def reindex_courses():
+def reindex_courses(async_mode=False, concurrency=8):
     """Re-index all courses"""
     print("📚 Re-indexing all courses...\n")
     
     # Import from your indexing script
     try:
-        from index_all_courses import COURSES, index_course
+        from index_all_courses import COURSES, index_course, index_courses_async
     except ImportError:
         print("❌ Cannot import index_all_courses.py")
         print("   Make sure the file exists in the same directory\n")
         return False
     
+    if async_mode:
+        # Concurrent requests with retries; an interrupted run resumes from its checkpoint
+        results = index_courses_async(COURSES, concurrency=concurrency)
+        success = sum(1 for r in results if r['success'])
+        failed = len(results) - success
+        print(f"\n✅ Successfully indexed: {success} courses")
+        if failed > 0:
+            print(f"❌ Failed: {failed} courses")
+        return failed == 0
+    
     success = 0
     failed = 0
     
@@ -119,10 +105,21 @@ def reindex_courses():
 
 
 if __name__ == "__main__":
+    # Reindexing is idempotent (deterministic point ids, stale chunks deleted),
+    # so the collection is only rebuilt from scratch when --reset is passed
+    reset = "--reset" in sys.argv[1:]
+    # --blue-green: build and validate a new collection version, then swap the alias
+    blue_green = "--blue-green" in sys.argv[1:]
+    # --async: concurrent, retrying, resumable indexing
+    async_mode = "--async" in sys.argv[1:]
+
     print("=" * 70)
-    print("🔄 RESET AND RE-INDEX SYSTEM")
+    print("🔄 RESET AND RE-INDEX SYSTEM" if reset else "🔄 RE-INDEX SYSTEM")
     print("=" * 70)
-    print("\n⚠️  This will DELETE all existing data and re-index from scratch")
+    if reset:
+        print("\n⚠️  This will REPLACE all existing data with a collection rebuilt from scratch")
+    else:
+        print("\nℹ️  Only changed chunks are rewritten (pass --reset to rebuild the collection)")
     
     try:
         input("Press Enter to continue or Ctrl+C to cancel...\n")
@@ -133,29 +130,23 @@ if __name__ == "__main__":
     # Step 1: Check backend
     print("\n📡 Checking backend status...")
     if not check_backend():
-        print("❌ Backend is not running!")
+        print("❌ Backend is not ready!")
         print("\n🔧 Start the backend first:")
         print("   cd e_learning_AI")
         print("   uvicorn app.main:app --reload --port 8000\n")
         sys.exit(1)
     else:
-        print("✅ Backend is running\n")
+        print("✅ Backend is ready\n")
     
-    # Step 2: Delete collection
-    delete_collection()
+    if blue_green:
+        sys.exit(0 if blue_green_reindex() else 1)
     
-    # Step 3: Recreate collection manually
-    if not recreate_collection():
-        print("❌ Failed to recreate collection")
-        print("\n🔧 Try restarting the backend:")
-        print("   1. Stop the backend (Ctrl+C)")
-        print("   2. Start it again: uvicorn app.main:app --reload --port 8000")
-        print("   3. Run this script again\n")
-        sys.exit(1)
+    if reset:
+        # Step 2: Build a fresh collection version and swap it in
+        sys.exit(0 if reset_collection() else 1)
     
-    # Step 4: Re-index
-    time.sleep(2)
-    if reindex_courses():
+    # Step 3: Re-index
+    if reindex_courses(async_mode=async_mode):
         print("\n" + "=" * 70)
         print("✅ RESET COMPLETE!")
         print("=" * 70)
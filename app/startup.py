@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Records wall-clock time per startup phase (imports, model load, warmup)"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = {}
+        self.status = "starting"
+        self.error = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = round(elapsed, 3)
+            logger.info(f"Startup phase '{name}' took {elapsed:.3f}s")
+
+    def mark_ready(self):
+        self.status = "ready"
+        self.phases["total"] = round(time.perf_counter() - self.started_at, 3)
+
+    def mark_failed(self, error: Exception):
+        self.status = "failed"
+        self.error = str(error)
+
+    def report(self) -> dict:
+        return {"status": self.status, "error": self.error, "phases": self.phases}
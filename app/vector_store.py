@@ -0,0 +1,444 @@
+from langchain_core.documents import Document
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+    VectorParams,
+)
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import copy
+import httpx
+import logging
+import re
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Payload layout shared with langchain's Qdrant wrapper
+CONTENT_KEY = "page_content"
+METADATA_KEY = "metadata"
+# Metadata fields /api/search can filter on, each with a keyword payload index
+KEYWORD_FILTER_FIELDS = ("category", "level", "instructor")
+
+
+def _as_list(vector: Sequence[float]) -> List[float]:
+    return vector.tolist() if hasattr(vector, "tolist") else list(vector)
+
+
+def payload_to_document(payload: Optional[dict], point_id: Any = None) -> Document:
+    """Rebuild a Document from a stored payload; Document.id carries the point id"""
+    payload = payload or {}
+    return Document(
+        id=str(point_id) if point_id is not None else None,
+        page_content=payload.get(CONTENT_KEY) or "",
+        metadata=payload.get(METADATA_KEY) or {},
+    )
+
+
+def versioned_name(collection_name: str, version: int) -> str:
+    return f"{collection_name}_v{version}"
+
+
+def _point_ids(docs: Sequence[Document]) -> List[str]:
+    """Document.id when set (deterministic chunk ids), else a random UUID"""
+    return [doc.id or str(uuid.uuid4()) for doc in docs]
+
+
+@lru_cache(maxsize=1024)
+def _cached_filter(conditions: Tuple[Tuple[str, Any], ...]) -> Filter:
+    """Filters are rebuilt per distinct condition set only; callers must not mutate them"""
+    return Filter(
+        must=[
+            FieldCondition(key=f"{METADATA_KEY}.{key}", match=MatchValue(value=value))
+            for key, value in conditions
+        ]
+    )
+
+
+class _SerializedClient:
+    """Runs one client call at a time.
+
+    The in-memory ``QdrantClient`` mutates shared arrays without locking, and
+    the gateway calls it from worker threads (the ``a``-prefixed fallbacks,
+    course cache loads, snapshots, ingest stages), so every call takes a lock.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return locked
+
+
+def create_vector_store(settings, dim: int):
+    """Build the vector store backend selected by settings.vector_backend"""
+    if settings.vector_backend.lower() == "numpy":
+        from .numpy_index import NumpyVectorStore
+
+        return NumpyVectorStore(settings, dim)
+    return VectorStoreGateway(settings, dim)
+
+
+class VectorStoreGateway:
+    """Single long-lived entry point to the Qdrant collection.
+
+    Owns one pooled ``QdrantClient`` (REST or gRPC) and exposes the typed
+    search/upsert operations used by indexing, search and chat. Filters are
+    plain ``{metadata_field: value}`` dicts.
+
+    The ``a``-prefixed methods go through an ``AsyncQdrantClient`` against a
+    server. The in-memory store can't be shared between a sync and an async
+    client, so in that mode they run the sync call on a worker thread instead;
+    the local client is wrapped so those calls still run one at a time.
+    """
+
+    def __init__(self, settings, dim: int):
+        self.settings = settings
+        self.collection_name = settings.collection_name
+        self.dim = dim
+        self.is_local = settings.qdrant_url == ":memory:"
+        # Bumped on every write so periodic snapshots can skip unchanged data
+        self.write_version = 0
+        self.client = self._create_client(QdrantClient)
+        self.async_client = None if self.is_local else self._create_client(AsyncQdrantClient)
+        self.ensure_collection()
+
+    def _create_client(self, client_class):
+        if self.is_local:
+            logger.info("Using in-memory Qdrant")
+            return _SerializedClient(client_class(location=":memory:"))
+
+        logger.info(
+            f"Connecting {client_class.__name__} to {self.settings.qdrant_url} "
+            f"({'gRPC' if self.settings.qdrant_prefer_grpc else 'REST'})"
+        )
+        return client_class(
+            url=self.settings.qdrant_url,
+            api_key=self.settings.qdrant_api_key if self.settings.qdrant_api_key else None,
+            prefer_grpc=self.settings.qdrant_prefer_grpc,
+            grpc_port=self.settings.qdrant_grpc_port,
+            timeout=self.settings.qdrant_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=self.settings.qdrant_pool_size,
+                max_keepalive_connections=self.settings.qdrant_pool_size,
+            ),
+        )
+
+    def ensure_collection(self):
+        """Make settings.collection_name resolvable: an alias to <name>_v1 on first start.
+
+        A plain collection with that name (from before versioning) is used as-is
+        until the first blue/green reindex replaces it with an alias.
+        """
+        collections = self.client.get_collections().collections
+        existing_names = [c.name for c in collections]
+
+        if self.collection_name not in existing_names and self.alias_target() is None:
+            first = versioned_name(self.collection_name, 1)
+            self.for_collection(first).create_collection()
+            self.swap_alias(first)
+        self._create_payload_indexes()
+
+    def create_collection(self):
+        """Create this gateway's collection (not an alias) with its payload indexes"""
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(
+                size=self.dim,
+                distance=Distance.COSINE,
+            ),
+        )
+        logger.info(f"Created collection: {self.collection_name}")
+        self._create_payload_indexes()
+
+    def _create_payload_indexes(self):
+        # Existing index for course_id at root (keep if you also filter on root)
+        self._create_payload_index("course_id", PayloadSchemaType.INTEGER)
+        # Index for nested metadata.course_id, used by every course filter
+        self._create_payload_index(f"{METADATA_KEY}.course_id", PayloadSchemaType.INTEGER)
+        # Keyword indexes let a server prefilter /api/search instead of scanning
+        for field in KEYWORD_FILTER_FIELDS:
+            self._create_payload_index(f"{METADATA_KEY}.{field}", PayloadSchemaType.KEYWORD)
+
+    # -- versioned collections --------------------------------------------
+
+    def for_collection(self, collection_name: str) -> "VectorStoreGateway":
+        """A gateway on another collection that shares this one's clients"""
+        gateway = copy.copy(self)
+        gateway.collection_name = collection_name
+        gateway.write_version = 0
+        return gateway
+
+    def alias_target(self, alias: Optional[str] = None) -> Optional[str]:
+        alias = alias or self.collection_name
+        for description in self.client.get_aliases().aliases:
+            if description.alias_name == alias:
+                return description.collection_name
+        return None
+
+    def collection_versions(self) -> List[Tuple[int, str]]:
+        """(version, name) of every <collection_name>_vN collection, oldest first"""
+        pattern = re.compile(rf"^{re.escape(self.collection_name)}_v(\d+)$")
+        versions = []
+        for collection in self.client.get_collections().collections:
+            match = pattern.match(collection.name)
+            if match:
+                versions.append((int(match.group(1)), collection.name))
+        return sorted(versions)
+
+    def swap_alias(self, target: str):
+        """Point the alias at target in one atomic operation"""
+        operations = []
+        if self.alias_target() is not None:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=self.collection_name)))
+        operations.append(
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=self.collection_name))
+        )
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        self.write_version += 1
+        logger.info(f"Alias {self.collection_name} -> {target}")
+
+    def drop_collection(self, collection_name: str):
+        self.client.delete_collection(collection_name)
+        logger.info(f"Dropped collection: {collection_name}")
+
+    def _create_payload_index(self, field_name: str, schema: PayloadSchemaType):
+        try:
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=schema,
+            )
+            logger.info(f"Created index for {field_name}")
+        except Exception as e:
+            logger.debug(f"Index {field_name} may already exist: {e}")
+
+    @staticmethod
+    def build_filter(filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        """Turn {"course_id": 3} into a Filter on the nested metadata fields"""
+        conditions = tuple(sorted((k, v) for k, v in (filters or {}).items() if v is not None))
+        if not conditions:
+            return None
+        return _cached_filter(conditions)
+
+    def search(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        response = self.client.query_points(
+            collection_name=self.collection_name,
+            query=_as_list(vector),
+            limit=top_k,
+            query_filter=self.build_filter(filters),
+            with_payload=True,
+        )
+        return [(payload_to_document(point.payload, point.id), point.score) for point in response.points]
+
+    async def asearch(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.search, vector, top_k, filters)
+
+        response = await self.async_client.query_points(
+            collection_name=self.collection_name,
+            query=_as_list(vector),
+            limit=top_k,
+            query_filter=self.build_filter(filters),
+            with_payload=True,
+        )
+        return [(payload_to_document(point.payload, point.id), point.score) for point in response.points]
+
+    def _groups(self, response) -> List[Tuple[Any, List[Tuple[Document, float]]]]:
+        return [
+            (group.id, [(payload_to_document(hit.payload, hit.id), hit.score) for hit in group.hits])
+            for group in response.groups
+        ]
+
+    def search_groups(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        group_size: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Any, List[Tuple[Document, float]]]]:
+        """Best top_k courses, each with up to group_size of its chunks (best first)"""
+        response = self.client.query_points_groups(
+            collection_name=self.collection_name,
+            group_by=f"{METADATA_KEY}.course_id",
+            query=_as_list(vector),
+            limit=top_k,
+            group_size=group_size,
+            query_filter=self.build_filter(filters),
+            with_payload=True,
+        )
+        return self._groups(response)
+
+    async def asearch_groups(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        group_size: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Any, List[Tuple[Document, float]]]]:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.search_groups, vector, top_k, group_size, filters)
+
+        response = await self.async_client.query_points_groups(
+            collection_name=self.collection_name,
+            group_by=f"{METADATA_KEY}.course_id",
+            query=_as_list(vector),
+            limit=top_k,
+            group_size=group_size,
+            query_filter=self.build_filter(filters),
+            with_payload=True,
+        )
+        return self._groups(response)
+
+    @staticmethod
+    def _to_points(docs, vectors, ids) -> List[PointStruct]:
+        return [
+            PointStruct(
+                id=point_id,
+                vector=_as_list(vector),
+                payload={CONTENT_KEY: doc.page_content, METADATA_KEY: doc.metadata},
+            )
+            for point_id, doc, vector in zip(ids, docs, vectors)
+        ]
+
+    def upsert_documents(
+        self,
+        docs: Sequence[Document],
+        vectors: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        if not docs:
+            return []
+        ids = list(ids) if ids is not None else _point_ids(docs)
+        self.client.upsert(
+            collection_name=self.collection_name, points=self._to_points(docs, vectors, ids)
+        )
+        self.write_version += 1
+        return ids
+
+    async def aupsert_documents(
+        self,
+        docs: Sequence[Document],
+        vectors: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.upsert_documents, docs, vectors, ids)
+        if not docs:
+            return []
+        ids = list(ids) if ids is not None else _point_ids(docs)
+        await self.async_client.upsert(
+            collection_name=self.collection_name, points=self._to_points(docs, vectors, ids)
+        )
+        self.write_version += 1
+        return ids
+
+    def delete_points(self, ids: Sequence[str]):
+        if not ids:
+            return
+        self.client.delete(
+            collection_name=self.collection_name, points_selector=PointIdsList(points=list(ids))
+        )
+        self.write_version += 1
+
+    async def adelete_points(self, ids: Sequence[str]):
+        if self.async_client is None:
+            return await asyncio.to_thread(self.delete_points, ids)
+        if not ids:
+            return
+        await self.async_client.delete(
+            collection_name=self.collection_name, points_selector=PointIdsList(points=list(ids))
+        )
+        self.write_version += 1
+
+    def upsert_payloads(
+        self,
+        ids: Sequence[Any],
+        vectors: Sequence[Sequence[float]],
+        payloads: Sequence[dict],
+    ):
+        """Write raw (id, vector, payload) points, e.g. when restoring a snapshot"""
+        points = [
+            PointStruct(id=point_id, vector=_as_list(vector), payload=payload)
+            for point_id, vector, payload in zip(ids, vectors, payloads)
+        ]
+        self.client.upsert(collection_name=self.collection_name, points=points)
+        self.write_version += 1
+
+    def payload_schema(self) -> Dict[str, str]:
+        """Field name -> index type for every payload index on the collection"""
+        info = self.client.get_collection(self.collection_name)
+        return {
+            field: str(getattr(schema.data_type, "value", schema.data_type))
+            for field, schema in (info.payload_schema or {}).items()
+        }
+
+    def create_payload_index(self, field_name: str, schema: str):
+        self._create_payload_index(field_name, PayloadSchemaType(schema))
+
+    def iter_points(
+        self,
+        with_vectors: bool = True,
+        batch_size: int = 256,
+        filters: Optional[Dict[str, Any]] = None,
+    ):
+        """Yield every (matching) point (id, vector, payload), page by page"""
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self.build_filter(filters),
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=with_vectors,
+            )
+            yield from records
+            if offset is None:
+                break
+
+    def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        return self.client.count(
+            collection_name=self.collection_name,
+            count_filter=self.build_filter(filters),
+            exact=True,
+        ).count
+
+    def close(self):
+        self.client.close()
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+        self.client.close()
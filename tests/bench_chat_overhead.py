@@ -0,0 +1,88 @@
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from langchain.prompts import PromptTemplate
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from app.config import Settings
+from app.embeddings_service import EmbeddingsService
+from app.rag_service import RAGService
+
+TURNS = 200
+QUESTIONS = [
+    "What topics does this course cover?",
+    "Who teaches it?",
+    "Which lessons are about testing?",
+    "and the advanced part?",
+]
+
+
+class OfflineRAGService(RAGService):
+    """RAGService with an instant fake LLM, so only the non-LLM work per turn is timed"""
+
+    def _initialize_llm(self, model: str = None):
+        return FakeListChatModel(responses=["A short answer from the course materials."])
+
+
+def ms(samples):
+    return f"p50 {statistics.median(samples):7.3f}ms  p90 {sorted(samples)[int(len(samples) * 0.9)]:7.3f}ms"
+
+
+async def run_turns(rag: RAGService, course_id):
+    overhead, retrieval = [], []
+    conversation_id = None
+    for i in range(TURNS):
+        if i % len(QUESTIONS) == 0:
+            conversation_id = None  # fresh conversation, so history stays short
+        result = await rag.chat(QUESTIONS[i % len(QUESTIONS)], course_id=course_id, conversation_id=conversation_id)
+        conversation_id = result["conversation_id"]
+        metrics = result["metrics"]
+        retrieval.append(metrics["retrieval_ms"])
+        overhead.append(metrics["total_ms"] - metrics["retrieval_ms"])
+    return overhead, retrieval
+
+
+def bench_chain_construction(rag: RAGService, repeats: int = 2000):
+    """What rebuilding the prompt and runnable on every turn used to cost"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        prompt = PromptTemplate(template=rag.prompt_template, input_variables=["context", "chat_history", "question"])
+        prompt | rag.llm | StrOutputParser()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def bench_chat_overhead():
+    print("=" * 60)
+    print("⏱️  CHAT PIPELINE OVERHEAD (fake LLM, real retrieval)")
+    print("=" * 60)
+
+    # The answer cache would serve the repeated questions without retrieval
+    settings = Settings(qdrant_url=":memory:", answer_cache_max_entries=0)
+    service = EmbeddingsService(settings)
+    with open(project_root / "data" / "courses.json", "r", encoding="utf-8") as f:
+        courses = json.load(f)["courses"]
+    for course in courses:
+        service.index_course(course)
+    course_id = courses[0]["id"]
+
+    for sample_rate in (0.0, 1.0):
+        settings.rag_trace_sample_rate = sample_rate
+        rag = OfflineRAGService(settings, service)
+        overhead, retrieval = asyncio.run(run_turns(rag, course_id))
+        print(f"\n🔎 Trace sample rate {sample_rate}:")
+        print(f"   retrieval               {ms(retrieval)}")
+        print(f"   rest of the turn        {ms(overhead)}")
+
+    print(f"\n🏗️  Per-turn chain construction (avoided): {bench_chain_construction(rag):.3f}ms")
+
+
+if __name__ == "__main__":
+    bench_chat_overhead()
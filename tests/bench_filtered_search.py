@@ -0,0 +1,89 @@
+import sys
+import time
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_core.documents import Document
+from app.config import Settings
+from app.vector_store import create_vector_store
+
+DIM = 384
+QUERIES = 200
+TOP_K = 5
+CHUNKS_PER_COURSE = 20
+CATEGORIES = ["Web Development", "Data Science", "Design", "Mobile Development", "Marketing"]
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+INSTRUCTORS = [f"Instructor {i}" for i in range(50)]
+
+FILTERS = {
+    "category": lambda i: {"category": CATEGORIES[i % len(CATEGORIES)]},
+    "level": lambda i: {"level": LEVELS[i % len(LEVELS)]},
+    "instructor": lambda i: {"instructor": INSTRUCTORS[i % len(INSTRUCTORS)]},
+    "cat+level": lambda i: {"category": CATEGORIES[i % len(CATEGORIES)], "level": LEVELS[i % len(LEVELS)]},
+}
+
+
+def make_corpus(size: int, rng):
+    vectors = rng.standard_normal((size, DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    docs = []
+    for i in range(size):
+        course = i // CHUNKS_PER_COURSE
+        docs.append(Document(
+            page_content=f"chunk {i}",
+            metadata={
+                "course_id": course,
+                "category": CATEGORIES[course % len(CATEGORIES)],
+                "level": LEVELS[course % len(LEVELS)],
+                "instructor": INSTRUCTORS[course % len(INSTRUCTORS)],
+                "chunk_index": i % CHUNKS_PER_COURSE,
+            },
+        ))
+    return docs, vectors
+
+
+def time_queries(store, queries, filters_for):
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        store.search(query, TOP_K, filters_for(i))
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def bench(settings, sizes):
+    target = "numpy" if settings.vector_backend == "numpy" else settings.qdrant_url
+    print("=" * 78)
+    print(f"📊 FILTERED SEARCH BENCHMARK ({target}, ms per query)")
+    print("=" * 78)
+    print(f"{'chunks':>9} {'none':>8} " + " ".join(f"{name:>11}" for name in FILTERS))
+
+    rng = np.random.default_rng(7)
+    store = create_vector_store(settings, DIM)
+    loaded = 0
+    for size in sizes:
+        # Grow the same collection so the indexes are exercised as it fills up
+        docs, vectors = make_corpus(size, rng)
+        for offset in range(loaded, size, 1000):
+            store.upsert_documents(docs[offset:offset + 1000], vectors[offset:offset + 1000])
+        loaded = size
+
+        queries = rng.standard_normal((QUERIES, DIM), dtype=np.float32)
+        row = [time_queries(store, queries, lambda i: None)]
+        row += [time_queries(store, queries, filters_for) for filters_for in FILTERS.values()]
+        print(f"{size:>9,} {row[0]:>8.2f} " + " ".join(f"{ms:>11.2f}" for ms in row[1:]))
+    store.close()
+
+
+if __name__ == "__main__":
+    # python tests/bench_filtered_search.py [qdrant_url|numpy] [sizes...]
+    # A Qdrant server shows the payload indexes at work; ":memory:" scans in Python
+    target = sys.argv[1] if len(sys.argv) > 1 else ":memory:"
+    sizes = [int(arg) for arg in sys.argv[2:]] or [1_000, 5_000, 20_000]
+    if target == "numpy":
+        settings = Settings(collection_name="bench_filtered", vector_backend="numpy")
+    else:
+        settings = Settings(collection_name="bench_filtered", qdrant_url=target)
+    bench(settings, sizes)
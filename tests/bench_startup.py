@@ -0,0 +1,67 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+# Run from the project root so `app.main` is importable in the subprocesses
+project_root = Path(__file__).resolve().parent.parent
+
+PORT = 8765
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+def measure_import_time() -> float:
+    """Time `import app.main` in a fresh interpreter"""
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def wait_for(path: str, deadline: float) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < deadline:
+        try:
+            if requests.get(f"{BASE_URL}{path}", timeout=1).status_code == 200:
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{path} not ready after {deadline}s")
+
+
+def bench_startup():
+    print("=" * 60)
+    print("⏱️  STARTUP BENCHMARK")
+    print("=" * 60)
+
+    print(f"\n📦 import app.main: {measure_import_time():.3f}s")
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT)],
+        cwd=project_root,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        live = wait_for("/health", deadline=30)
+        print(f"💓 /health (liveness) after: {live:.3f}s")
+        ready = wait_for("/ready", deadline=300)
+        print(f"✅ /ready (models loaded) after: {time.perf_counter() - start:.3f}s "
+              f"({ready:.3f}s after liveness)")
+
+        report = requests.get(f"{BASE_URL}/ready", timeout=5).json()
+        print("\n📊 Per-phase startup time:")
+        for phase, seconds in report["phases"].items():
+            print(f"   {phase:<28} {seconds:>8.3f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    bench_startup()
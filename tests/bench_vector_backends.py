@@ -0,0 +1,85 @@
+import sys
+import time
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_core.documents import Document
+from app.config import Settings
+from app.numpy_index import NumpyVectorStore
+from app.vector_store import VectorStoreGateway
+
+DIM = 384
+QUERIES = 200
+TOP_K = 5
+CHUNKS_PER_COURSE = 20
+CATEGORIES = ["Web Development", "Data Science", "Design", "Mobile Development", "Marketing"]
+
+# Qdrant local mode inserts in pure Python; cap it so the run stays reasonable
+QDRANT_MAX_SIZE = 100_000
+
+
+def make_corpus(size: int, rng):
+    vectors = rng.standard_normal((size, DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    docs = [
+        Document(
+            page_content=f"chunk {i}",
+            metadata={
+                "course_id": i // CHUNKS_PER_COURSE,
+                "category": CATEGORIES[(i // CHUNKS_PER_COURSE) % len(CATEGORIES)],
+                "chunk_index": i % CHUNKS_PER_COURSE,
+            },
+        )
+        for i in range(size)
+    ]
+    return docs, vectors
+
+
+def load(store, docs, vectors, batch_size=1000):
+    start = time.perf_counter()
+    for offset in range(0, len(docs), batch_size):
+        store.upsert_documents(docs[offset:offset + batch_size], vectors[offset:offset + batch_size])
+    return time.perf_counter() - start
+
+
+def time_queries(store, queries, filters_for):
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        store.search(query, TOP_K, filters_for(i))
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def bench(sizes):
+    print("=" * 78)
+    print("📊 VECTOR BACKEND BENCHMARK (ms per query, top_k=5)")
+    print("=" * 78)
+    print(f"{'backend':<8} {'chunks':>9} {'load s':>8} {'unfiltered':>11} {'course':>9} {'category':>9}")
+
+    rng = np.random.default_rng(42)
+    for size in sizes:
+        docs, vectors = make_corpus(size, rng)
+        queries = rng.standard_normal((QUERIES, DIM), dtype=np.float32)
+        courses = max(1, size // CHUNKS_PER_COURSE)
+
+        backends = [("numpy", NumpyVectorStore(Settings(collection_name="bench"), DIM))]
+        if size <= QDRANT_MAX_SIZE:
+            backends.append(
+                ("qdrant", VectorStoreGateway(Settings(collection_name="bench", qdrant_url=":memory:"), DIM))
+            )
+
+        for name, store in backends:
+            load_s = load(store, docs, vectors)
+            unfiltered = time_queries(store, queries, lambda i: None)
+            course = time_queries(store, queries, lambda i: {"course_id": i % courses})
+            category = time_queries(store, queries, lambda i: {"category": CATEGORIES[i % len(CATEGORIES)]})
+            print(f"{name:<8} {size:>9,} {load_s:>8.1f} {unfiltered:>11.2f} {course:>9.2f} {category:>9.2f}")
+            store.close()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000]
+    bench(sizes)
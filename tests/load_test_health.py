@@ -0,0 +1,99 @@
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+# Point at a running backend: uvicorn app.main:app --port 8000
+BASE_URL = "http://localhost:8000"
+CHAT_CONCURRENCY = 32
+DURATION_SECONDS = 20
+HEALTH_INTERVAL = 0.05
+
+QUESTIONS = [
+    "What will I learn?",
+    "What are the requirements?",
+    "Tell me about the lessons",
+    "Who is the instructor?",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label, samples):
+    ms = [s * 1000 for s in samples]
+    print(
+        f"   {label:<24} n={len(ms):<5} p50={percentile(ms, 50):8.1f}ms "
+        f"p99={percentile(ms, 99):8.1f}ms max={max(ms):8.1f}ms"
+    )
+
+
+async def sample_health(client, stop_at):
+    latencies = []
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        await client.get(f"{BASE_URL}/health")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(HEALTH_INTERVAL)
+    return latencies
+
+
+async def chat_worker(client, worker_id, stop_at, latencies, errors):
+    i = worker_id
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            response = await client.post(
+                f"{BASE_URL}/api/chat",
+                json={"message": QUESTIONS[i % len(QUESTIONS)], "course_id": 1 + i % 6},
+            )
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        i += 1
+
+
+async def load_test():
+    print("=" * 60)
+    print("🔥 LOAD TEST: /health latency while /api/chat is saturated")
+    print("=" * 60)
+
+    limits = httpx.Limits(max_connections=CHAT_CONCURRENCY + 4)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        baseline = await sample_health(client, time.perf_counter() + 3)
+
+        stop_at = time.perf_counter() + DURATION_SECONDS
+        chat_latencies, errors = [], []
+        workers = [
+            chat_worker(client, i, stop_at, chat_latencies, errors)
+            for i in range(CHAT_CONCURRENCY)
+        ]
+        results = await asyncio.gather(sample_health(client, stop_at), *workers)
+        loaded = results[0]
+
+    print("\n📊 Results:")
+    summarize("/health (idle)", baseline)
+    summarize("/health (under load)", loaded)
+    if chat_latencies:
+        summarize("/api/chat", chat_latencies)
+        print(f"   /api/chat throughput: {len(chat_latencies) / DURATION_SECONDS:.2f} req/s")
+    print(f"   errors: {len(errors)}")
+
+    ratio = percentile(loaded, 99) / max(percentile(baseline, 99), 1e-6)
+    print(f"\n/health p99 under load is {ratio:.1f}x idle p99 "
+          f"(idle median {statistics.median(baseline) * 1000:.1f}ms)")
+    return ratio
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        BASE_URL = sys.argv[1]
+    asyncio.run(load_test())
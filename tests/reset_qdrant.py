@@ -1,18 +1,35 @@
+import re
+
 from qdrant_client import QdrantClient
+from qdrant_client.models import DeleteAlias, DeleteAliasOperation
+
+COLLECTION_NAME = "elearning_courses"
+
 
 def reset_collection():
-    """Delete Qdrant collection to start fresh"""
+    """Delete the Qdrant collection (the alias and every version behind it) to start fresh.
+
+    The backend recreates ``elearning_courses_v1`` and the alias on its next start.
+    """
     try:
         client = QdrantClient(url="http://localhost:6333")
-        
-        # Check and delete collection
-        collections = client.get_collections().collections
-        if any(col.name == "elearning_courses" for col in collections):
-            client.delete_collection("elearning_courses")
-            print("✅ Deleted collection 'elearning_courses'")
-        else:
+
+        aliases = [a for a in client.get_aliases().aliases if a.alias_name == COLLECTION_NAME]
+        if aliases:
+            client.update_collection_aliases(
+                change_aliases_operations=[DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=COLLECTION_NAME))]
+            )
+            print(f"✅ Deleted alias '{COLLECTION_NAME}' -> '{aliases[0].collection_name}'")
+
+        # Versioned collections, plus a plain one from before versioning
+        pattern = re.compile(rf"^{re.escape(COLLECTION_NAME)}(_v\d+)?$")
+        doomed = [col.name for col in client.get_collections().collections if pattern.match(col.name)]
+        for name in doomed:
+            client.delete_collection(name)
+            print(f"✅ Deleted collection '{name}'")
+        if not aliases and not doomed:
             print("ℹ️ Collection doesn't exist yet")
-            
+
     except Exception as e:
         print(f"❌ Error: {e}")
 
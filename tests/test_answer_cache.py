@@ -0,0 +1,53 @@
+import sys
+import time
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.answer_cache import SemanticAnswerCache
+
+
+def test_semantic_answer_cache():
+    """Near-identical questions hit within a course; reindexing, LRU and TTL evict"""
+    print("🔍 Testing semantic answer cache...")
+
+    cache = SemanticAnswerCache(max_entries=3, ttl_seconds=60, threshold=0.95)
+    cache.put((1, "hybrid"), [1.0, 0.0, 0.0], "Components and routing.", [])
+
+    hit = cache.get((1, "hybrid"), [0.99, 0.05, 0.0])
+    assert hit is not None and hit[0] == "Components and routing."
+    assert cache.get((1, "hybrid"), [0.0, 1.0, 0.0]) is None  # different question
+    assert cache.get((2, "hybrid"), [1.0, 0.0, 0.0]) is None  # different course
+    assert cache.get((1, "dense"), [1.0, 0.0, 0.0]) is None  # different retrieval mode
+
+    # Reindexing course 1 drops its answers and the unscoped ones, not course 2's
+    cache.put((2, "hybrid"), [1.0, 0.0, 0.0], "Hooks.", [])
+    cache.put((None, "hybrid"), [0.0, 1.0, 0.0], "Three courses.", [])
+    cache.invalidate(1)
+    assert cache.get((1, "hybrid"), [1.0, 0.0, 0.0]) is None
+    assert cache.get((None, "hybrid"), [0.0, 1.0, 0.0]) is None
+    assert cache.get((2, "hybrid"), [1.0, 0.0, 0.0])[0] == "Hooks."
+
+    # LRU: three newer answers fill the cache and evict course 2's, the least recently used
+    for i in range(3):
+        cache.put((3, "hybrid"), [0.0, 0.0, 1.0 + i], f"answer {i}", [])
+    assert cache.stats()["entries"] == 3
+    assert cache.get((2, "hybrid"), [1.0, 0.0, 0.0]) is None
+
+    expiring = SemanticAnswerCache(max_entries=10, ttl_seconds=0.01, threshold=0.95)
+    expiring.put((1, "hybrid"), [1.0, 0.0], "old", [])
+    time.sleep(0.02)
+    assert expiring.get((1, "hybrid"), [1.0, 0.0]) is None
+
+    stats = cache.stats()
+    print(f"📊 Stats: {stats}")
+    assert stats["hits"] == 2 and stats["invalidated"] == 2
+
+    print("✅ Semantic answer cache working!")
+    return True
+
+
+if __name__ == "__main__":
+    test_semantic_answer_cache()
@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_core.documents import Document
+from app.config import Settings
+from app.course_cache import CourseChunkCache
+from app.numpy_index import NumpyVectorStore
+
+
+def make_store(dim=8):
+    store = NumpyVectorStore(Settings(), dim)
+    rng = np.random.default_rng(0)
+    docs, vectors = [], []
+    for course_id, chunks in ((1, 3), (2, 5)):
+        for i in range(chunks):
+            docs.append(Document(page_content=f"course {course_id} chunk {i}",
+                                 metadata={"course_id": course_id, "chunk_index": i}))
+            vector = rng.normal(size=dim)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+    store.upsert_documents(docs, vectors)
+    return store, vectors
+
+
+def test_course_chunk_cache():
+    """Cached course search matches the store; large courses and invalidation fall back"""
+    print("🔍 Testing course chunk cache...")
+
+    store, vectors = make_store()
+    cache = CourseChunkCache(store, max_bytes=2**20, max_chunks=4)
+
+    query = vectors[1]
+    cached = cache.search(1, query, 2)
+    expected = store.search(query, 2, {"course_id": 1})
+    assert [d.page_content for d, _ in cached] == [d.page_content for d, _ in expected]
+    assert all(abs(a - b) < 1e-4 for (_, a), (_, b) in zip(cached, expected))
+
+    cache.search(1, query, 2)
+    assert cache.search(2, query, 2) is None  # 5 chunks > max_chunks
+    stats = cache.stats()
+    print(f"📊 Stats: {stats}")
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["courses"] == 1
+
+    cache.invalidate(1)
+    assert cache.stats()["courses"] == 0
+    assert cache.search(1, query, 2) is not None
+
+    print("✅ Course chunk cache working!")
+    return True
+
+
+if __name__ == "__main__":
+    test_course_chunk_cache()
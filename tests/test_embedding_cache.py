@@ -0,0 +1,128 @@
+import sys
+import tempfile
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from langchain_core.embeddings import Embeddings
+from app.embedding_cache import CachedEmbeddings, DiskEmbeddingCache, EmbeddingCacheLocked, QueryEmbeddingCache
+
+
+class CountingEmbeddings(Embeddings):
+    """Tiny deterministic embedder that counts how many texts it embedded"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0, 0.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_embedding_cache():
+    """Unchanged chunks are served from disk, even after a reopen"""
+    print("🔍 Testing on-disk embedding cache...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = CountingEmbeddings()
+        cached = CachedEmbeddings(base, "test-model", DiskEmbeddingCache(tmp, dim=4, max_entries=3))
+
+        first = cached.embed_documents(["alpha", "beta"])
+        again = cached.embed_documents(["alpha", "  beta  ", "gamma"])
+        assert base.calls == 3, base.calls
+        assert again[:2] == first
+
+        # One process per directory: slots are assigned in memory
+        try:
+            DiskEmbeddingCache(tmp, dim=4, max_entries=3)
+            raise AssertionError("expected the directory to be locked")
+        except EmbeddingCacheLocked:
+            pass
+
+        # Reopen from disk: nothing should be re-embedded
+        cached.close()
+        reopened = CachedEmbeddings(base, "test-model", DiskEmbeddingCache(tmp, dim=4, max_entries=3))
+        reopened.embed_documents(["alpha", "beta", "gamma"])
+        assert base.calls == 3, base.calls
+
+        # Capacity is 3: adding "delta" evicts the least recently used key
+        reopened.embed_documents(["delta"])
+        reopened.embed_documents(["alpha"])
+        assert base.calls == 5, base.calls
+
+    print("✅ Embedding cache working!")
+    return True
+
+
+def test_embedding_cache_journal():
+    """Flushes append to the journal; reopening replays it, evictions included"""
+    print("🔍 Testing embedding cache journal...")
+
+    base = CountingEmbeddings()
+    expected = {text: base.embed_documents([text])[0] for text in ["a", "bb", "ccc", "dddd", "eeeee"]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiskEmbeddingCache(tmp, dim=4, max_entries=3)
+        index_size = (Path(tmp) / "index.json").stat().st_size
+        for text in expected:  # one flush per call, evicting "a" and "bb"
+            cache.put_many([text], [expected[text]])
+            cache.flush()
+        # Only the journal grew; the index is rewritten once it's as long as the index
+        assert (Path(tmp) / "index.json").stat().st_size == index_size
+
+        # Reopen without close() (dropping the instance releases its lock, like a
+        # crash would): evicted slots now belong to their new keys
+        del cache
+        reopened = DiskEmbeddingCache(tmp, dim=4, max_entries=3)
+        vectors = reopened.get_many(list(expected))
+        assert vectors[0] is None and vectors[1] is None
+        for text, vector in zip(list(expected)[2:], vectors[2:]):
+            assert vector.tolist() == expected[text], text
+
+        # close() folds the journal into the index; a leftover old journal is ignored
+        reopened.close()
+        journal = Path(tmp) / "index.log"
+        assert not journal.exists()
+        journal.write_text("# generation 0\nstale 0\n")
+        stale, kept = DiskEmbeddingCache(tmp, dim=4, max_entries=3).get_many(["stale", "ccc"])
+        assert stale is None and kept.tolist() == expected["ccc"]
+        assert len(DiskEmbeddingCache(tmp, dim=4, max_entries=3)) == 3
+
+    print("✅ Embedding cache journal working!")
+    return True
+
+
+def test_query_cache():
+    """Repeated questions skip the model; expired entries count as misses"""
+    print("🔍 Testing query embedding cache...")
+
+    base = CountingEmbeddings()
+    query_cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=60)
+    cached = CachedEmbeddings(base, "test-model", query_cache=query_cache)
+
+    cached.embed_query("What will I learn?")
+    cached.embed_query("  what will I learn?")
+    assert base.calls == 1, base.calls
+
+    query_cache.ttl_seconds = -1
+    cached.embed_query("What are the requirements?")
+    cached.embed_query("What are the requirements?")
+    assert base.calls == 3, base.calls
+
+    stats = query_cache.stats()
+    print(f"📊 Stats: {stats}")
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+    print("✅ Query cache working!")
+    return True
+
+
+if __name__ == "__main__":
+    test_embedding_cache()
+    test_embedding_cache_journal()
+    test_query_cache()
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.ingest import JsonStreamDecoder, MalformedJson, aiter_json_values
+
+COURSES = [
+    {"course_id": i, "title": f"Course {i}", "content": 'Braces {in} "strings" \\ too', "tags": [{"k": "}"}]}
+    for i in range(4)
+]
+
+
+def decode(text: str, chunk_size: int):
+    decoder = JsonStreamDecoder()
+    values = []
+    for offset in range(0, len(text), chunk_size):
+        values += decoder.feed(text[offset:offset + chunk_size])
+    decoder.close()
+    return values
+
+
+def summary(values):
+    return ["bad" if isinstance(v, MalformedJson) else v["course_id"] for v in values]
+
+
+def test_json_stream_decoder():
+    """Values split across chunks decode whole; a malformed line is reported and skipped"""
+    print("🔍 Testing streaming JSON decoder...")
+
+    ndjson = "\n".join(json.dumps(course) for course in COURSES)
+    for chunk_size in (1, 7, 4096):
+        assert decode(ndjson, chunk_size) == COURSES
+        assert decode(json.dumps(COURSES, indent=2), chunk_size) == COURSES
+
+    lines = ndjson.split("\n")
+    for bad_line in ['{"course_id": 9, "title": "Missing brace"',
+                     '{"course_id": 9, "title": "Unterminated',
+                     '{"course_id": 9 "title": "Missing comma"}',
+                     "not json at all"]:
+        stream = "\n".join(lines[:2] + [bad_line] + lines[2:])
+        for chunk_size in (1, 7, 4096):
+            assert summary(decode(stream, chunk_size)) == [0, 1, "bad", 2, 3], bad_line
+
+    # A malformed element of a pretty-printed array is skipped as a whole
+    pretty = json.dumps(COURSES, indent=2).replace('"course_id": 1,', '"course_id": 1', 1)
+    assert summary(decode(pretty, 5)) == [0, "bad", 2, 3]
+
+    try:
+        decode(ndjson[:-3], 7)
+        raise AssertionError("expected a truncation error")
+    except ValueError:
+        pass
+
+    async def from_bytes():
+        data = ("\n".join(lines[:2] + ["{oops}"] + lines[2:])).encode()
+
+        async def chunks():
+            for offset in range(0, len(data), 10):
+                yield data[offset:offset + 10]
+
+        return [value async for value in aiter_json_values(chunks())]
+
+    values = asyncio.run(from_bytes())
+    print(f"📊 Decoded: {summary(values)}")
+    assert summary(values) == [0, 1, "bad", 2, 3]
+
+    print("✅ Streaming JSON decoder working!")
+    return True
+
+
+def test_truncated_stream_ingest():
+    """A stream cut off mid-course still stores and reports every complete course"""
+    print("🔍 Testing ingestion of a truncated stream...")
+
+    import hashlib
+    import tempfile
+
+    from langchain_core.embeddings import Embeddings
+    import app.embeddings_service as embeddings_module
+    from app.config import Settings
+    from app.embeddings_service import EMBEDDING_DIM, EmbeddingsService
+    from app.ingest import BatchIngestor
+
+    class HashEmbeddings(Embeddings):
+        """Deterministic offline embedder, so the test doesn't need the model download"""
+
+        def embed_documents(self, texts):
+            return [self.embed_query(text) for text in texts]
+
+        def embed_query(self, text):
+            digest = hashlib.sha256(text.encode()).digest()
+            return [digest[i % len(digest)] / 255.0 + 0.01 for i in range(EMBEDDING_DIM)]
+
+    courses = [
+        {"course_id": i, "title": f"Course {i}", "description": "About testing",
+         "content": f"Lesson {i}. " + "Unit tests and fixtures. " * 60,
+         "instructor": "Jane Doe", "category": "Testing", "level": "Beginner"}
+        for i in range(1, 5)
+    ]
+    body = "\n".join(json.dumps(course) for course in courses)
+    body = body[:body.rindex("\n") + 40].encode()  # course 4 is cut off
+
+    async def chunks():
+        for offset in range(0, len(body), 512):
+            yield body[offset:offset + 512]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Settings(qdrant_url=":memory:", snapshot_dir="", embedding_cache_dir=tmp,
+                            chunk_size=500, chunk_overlap=0)
+        real_builder = embeddings_module.build_base_embeddings
+        embeddings_module.build_base_embeddings = lambda _: (HashEmbeddings(), "hash")
+        try:
+            service = EmbeddingsService(settings)
+        finally:
+            embeddings_module.build_base_embeddings = real_builder
+        ingestor = BatchIngestor(service, batch_size=4)
+        summary = asyncio.run(ingestor.ingest(aiter_json_values(chunks())))
+
+        print(f"📊 Totals: {summary['totals']}")
+        statuses = [(r["course_id"], r["status"]) for r in summary["results"]]
+        assert statuses == [(1, "indexed"), (2, "indexed"), (3, "indexed"), (None, "error")], statuses
+        assert "Truncated" in summary["results"][-1]["error"]
+        for result in summary["results"][:3]:
+            stored = service.manifest.stored_count(result["course_id"])
+            assert stored == result["chunks"] > 1, (result, stored)
+        assert service.vector_store.count() == sum(r["chunks"] for r in summary["results"][:3])
+
+    print("✅ Truncated stream ingested up to the cut!")
+    return True
+
+
+if __name__ == "__main__":
+    test_json_stream_decoder()
+    test_truncated_stream_ingest()
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+from app.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def make_doc(text, course_id):
+    return Document(page_content=text, metadata={"course_id": course_id})
+
+
+def test_bm25_index():
+    """Exact tool names rank first, and upserts/deletes keep the postings in sync"""
+    print("🔍 Testing BM25 lexical index...")
+
+    assert "scikit-learn" in tokenize("Intro to Scikit-learn") and "learn" in tokenize("scikit-learn")
+
+    index = BM25Index()
+    index.add_many(["a", "b", "c"], [
+        make_doc("Prototype screens in Figma", 1),
+        make_doc("Reactive streams with RxJS operators", 2),
+        make_doc("Train models with scikit-learn pipelines", 3),
+    ])
+    assert [d.id for d, _ in index.search("figma", 3)] == ["a"]
+    assert [d.id for d, _ in index.search("Scikit-learn", 3)] == ["c"]
+    assert index.search("rxjs", 3, {"course_id": 1}) == []
+
+    # Re-upserting an id replaces its terms
+    index.add_many(["a"], [make_doc("Wireframes with Sketch", 1)])
+    assert index.search("figma", 3) == []
+    assert len(index) == 3
+
+    index.remove_many(["b", "c"])
+    assert len(index) == 1 and index.search("rxjs", 3) == []
+    assert [d.id for d, _ in index.search("sketch", 3)] == ["a"]
+
+    print("✅ BM25 index working!")
+    return True
+
+
+def test_reciprocal_rank_fusion():
+    """Documents ranked well by both lists come first"""
+    print("🔍 Testing reciprocal-rank fusion...")
+
+    x, y, z = (Document(id=i, page_content=i) for i in "xyz")
+    fused = reciprocal_rank_fusion([[(x, 0.9), (y, 0.8)], [(y, 7.0), (z, 3.0)]], top_k=3)
+    print(f"📊 Fused: {[(d.id, round(s, 4)) for d, s in fused]}")
+    assert [d.id for d, _ in fused] == ["y", "x", "z"]
+
+    print("✅ Fusion working!")
+    return True
+
+
+if __name__ == "__main__":
+    test_bm25_index()
+    test_reciprocal_rank_fusion()
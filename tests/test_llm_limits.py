@@ -0,0 +1,66 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.llm_limits import LLMTimeoutError, ProviderLimiter
+
+
+async def fake_call(seconds: float, peak: dict, limiter: ProviderLimiter):
+    peak["max"] = max(peak["max"], limiter.in_flight)
+    await asyncio.sleep(seconds)
+    return "ok"
+
+
+async def fake_stream(tokens: int, seconds: float):
+    for i in range(tokens):
+        await asyncio.sleep(seconds)
+        yield f"t{i}"
+
+
+async def run_limiter_checks():
+    limiter = ProviderLimiter("fake", max_concurrency=4, timeout_seconds=2.0)
+    peak = {"max": 0}
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(limiter.call(lambda: fake_call(0.1, peak, limiter)) for _ in range(8)))
+    elapsed = time.perf_counter() - start
+    print(f"📊 8 calls at concurrency 4: {elapsed:.2f}s, peak in flight {peak['max']}")
+    assert results == ["ok"] * 8 and peak["max"] == 4
+    assert 0.18 < elapsed < 0.5
+
+    tokens = [t async for t in limiter.stream(lambda: fake_stream(3, 0.01))]
+    assert tokens == ["t0", "t1", "t2"]
+
+    limiter.timeout_seconds = 0.05
+    try:
+        await limiter.call(lambda: fake_call(1.0, peak, limiter))
+        raise AssertionError("expected a timeout")
+    except LLMTimeoutError:
+        pass
+    try:
+        async for _ in limiter.stream(lambda: fake_stream(10, 0.02)):
+            pass
+        raise AssertionError("expected a timeout")
+    except LLMTimeoutError:
+        pass
+
+    stats = limiter.stats()
+    assert stats["timeouts"] == 2 and stats["in_flight"] == 0 and stats["queued"] == 0
+    return stats
+
+
+def test_provider_limiter():
+    """Calls beyond the cap queue, and slow calls or streams time out without leaking slots"""
+    print("🔍 Testing LLM provider limiter...")
+    print(f"📊 Stats: {asyncio.run(run_limiter_checks())}")
+    print("✅ LLM provider limiter working!")
+    return True
+
+
+if __name__ == "__main__":
+    test_provider_limiter()
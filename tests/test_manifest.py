@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from langchain_core.documents import Document
+from app.manifest import CourseManifest
+
+
+def make_chunks(texts, course_id=7):
+    return [
+        Document(page_content=text, metadata={"course_id": course_id, "chunk_index": i})
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_course_manifest():
+    """Reindexing an unchanged course touches nothing; an edit touches only its chunk"""
+    print("🔍 Testing course manifest...")
+
+    manifest = CourseManifest()
+    docs = make_chunks(["intro", "lesson one", "lesson two"])
+    ids = manifest.assign_ids(docs)
+    assert ids == manifest.assign_ids(make_chunks(["intro", "lesson one", "lesson two"]))
+
+    changed, stale = manifest.diff(7, ids)
+    assert changed == [0, 1, 2] and stale == []
+    manifest.update(7, docs)
+
+    same = make_chunks(["intro", "lesson one", "lesson two"])
+    assert manifest.diff(7, manifest.assign_ids(same)) == ([], [])
+
+    edited = make_chunks(["intro", "lesson one (updated)"])
+    changed, stale = manifest.diff(7, manifest.assign_ids(edited))
+    print(f"📊 Changed: {changed}, stale: {len(stale)}")
+    assert changed == [1] and sorted(stale) == sorted(ids[1:])
+
+    # A chunk shifted by an edit before it is rewritten with its new offset
+    shifted = make_chunks(["intro", "lesson one", "lesson two"])
+    for doc, start in zip(shifted, [0, 12, 38]):
+        doc.metadata["start_index"] = start
+    manifest.assign_ids(shifted)
+    manifest.update(7, shifted)
+    shifted[2].metadata["start_index"] = 49
+    assert manifest.diff(7, manifest.assign_ids(shifted))[0] == [2]
+
+    # Metadata edits (e.g. a renamed course) change the ids too
+    renamed = make_chunks(["intro"])
+    renamed[0].metadata["title"] = "New title"
+    assert manifest.diff(7, manifest.assign_ids(renamed))[0] == [0]
+
+    print("✅ Course manifest working!")
+    return True
+
+
+if __name__ == "__main__":
+    test_course_manifest()
@@ -0,0 +1,72 @@
+import sys
+import uuid
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_core.documents import Document
+from app.config import Settings
+from app.numpy_index import NumpyVectorStore
+
+DIM = 8
+
+
+def make_docs(course_id, count):
+    return [
+        Document(page_content=f"course {course_id} chunk {i}", metadata={"course_id": course_id, "chunk_index": i},
+                 id=str(uuid.uuid4()))
+        for i in range(count)
+    ]
+
+
+def test_numpy_index_compaction():
+    """Reindexing edited chunks over and over doesn't grow the index; search stays exact"""
+    print("🔍 Testing NumPy index compaction...")
+
+    store = NumpyVectorStore(Settings(), DIM)
+    rng = np.random.default_rng(0)
+    live = {}
+    for course_id in (1, 2, 3):
+        docs = make_docs(course_id, 10)
+        vectors = rng.normal(size=(10, DIM))
+        store.upsert_documents(docs, vectors.tolist())
+        live.update({doc.id: (course_id, vector) for doc, vector in zip(docs, vectors)})
+
+    # Incremental reindexing: each round replaces two chunks of a course with new ids
+    for round_number in range(50):
+        course_id = round_number % 3 + 1
+        doomed = [point_id for point_id, (owner, _) in live.items() if owner == course_id][:2]
+        docs = make_docs(course_id, 2)
+        vectors = rng.normal(size=(2, DIM))
+        store.upsert_documents(docs, vectors.tolist())
+        store.delete_points(doomed)
+        for point_id in doomed:
+            del live[point_id]
+        live.update({doc.id: (course_id, vector) for doc, vector in zip(docs, vectors)})
+
+    print(f"📊 Rows stored: {store._size} for {len(live)} live points")
+    assert store.count() == len(live) == 30
+    assert store._size <= len(live) * 4 / 3 + 2
+    assert sum(len(ranges) for ranges in store._course_ranges.values()) <= 3 + 2 * 10
+
+    query = rng.normal(size=DIM)
+    for course_id in (None, 2):
+        expected = sorted(
+            (point_id for point_id, (owner, _) in live.items() if course_id is None or owner == course_id),
+            key=lambda point_id: -live[point_id][1] @ query / np.linalg.norm(live[point_id][1]),
+        )[:5]
+        hits = store.search(query.tolist(), 5, {"course_id": course_id})
+        assert [doc.id for doc, _ in hits] == expected, course_id
+        assert all(doc.metadata["course_id"] == course_id for doc, _ in hits if course_id is not None)
+
+    assert {record.id for record in store.iter_points()} == set(live)
+
+    print("✅ NumPy index compaction working!")
+    return True
+
+
+if __name__ == "__main__":
+    test_numpy_index_compaction()
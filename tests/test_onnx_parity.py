@@ -0,0 +1,75 @@
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+from app.embeddings_service import EMBEDDING_MODEL_NAME, EMBEDDING_DIM
+from app.onnx_embeddings import OnnxEmbeddings
+
+# Minimum cosine similarity between PyTorch and ONNX vectors for the same text
+MIN_COSINE_FP32 = 0.9999
+MIN_COSINE_INT8 = 0.98
+
+SAMPLES = [
+    "What will I learn?",
+    "What are the requirements?",
+    "Title: Complete Angular Developer Course\nInstructor: John Smith\nCategory: Web Development",
+    "Lessons:\n- Introduction to Angular: Get started with Angular framework\n- Routing and Navigation",
+    "Work with RxJS and reactive programming",
+    "Figma prototyping for UI/UX designers",
+    "Scikit-learn pipelines for machine learning beginners " * 20,
+]
+
+
+def _timed(fn, texts, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        vectors = fn(texts)
+    return np.asarray(vectors, dtype=np.float32), (time.perf_counter() - start) / repeats
+
+
+def test_onnx_parity():
+    """ONNX backends must stay within a bounded cosine drift of PyTorch"""
+    print("🔍 Testing ONNX embedding parity against PyTorch...")
+
+    reference = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+    ref_vectors, ref_time = _timed(reference.embed_documents, SAMPLES)
+    print(f"⏱️  PyTorch fp32: {ref_time * 1000:.1f} ms per batch")
+
+    ok = True
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for quantize, bound in ((False, MIN_COSINE_FP32), (True, MIN_COSINE_INT8)):
+            label = "int8" if quantize else "fp32"
+            onnx = OnnxEmbeddings(EMBEDDING_MODEL_NAME, cache_dir, quantize=quantize)
+            vectors, elapsed = _timed(onnx.embed_documents, SAMPLES)
+
+            assert vectors.shape == (len(SAMPLES), EMBEDDING_DIM), vectors.shape
+            assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-4)
+
+            cosines = np.sum(vectors * ref_vectors, axis=1)
+            print(
+                f"📊 ONNX {label}: min cosine {cosines.min():.5f}, "
+                f"{elapsed * 1000:.1f} ms per batch ({ref_time / elapsed:.1f}x)"
+            )
+            if cosines.min() < bound:
+                print(f"❌ ONNX {label} drift exceeds bound {bound}")
+                ok = False
+
+    if ok:
+        print("✅ ONNX backends match PyTorch!")
+    assert ok
+    return ok
+
+
+if __name__ == "__main__":
+    test_onnx_parity()
@@ -0,0 +1,70 @@
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+# Ensure the project root (parent of the tests folder) is on sys.path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from langchain_core.documents import Document
+from app.config import Settings
+from app.vector_store import VectorStoreGateway
+
+DIM = 16
+
+
+def make_docs(count, course_id):
+    return [
+        Document(page_content=f"chunk {i}", metadata={"course_id": course_id, "category": "Design"},
+                 id=str(uuid.uuid4()))
+        for i in range(count)
+    ]
+
+
+def test_local_gateway_threads():
+    """One writer and three readers on the in-memory store never see a half-applied write"""
+    print("🔍 Testing concurrent access to the in-memory gateway...")
+
+    gateway = VectorStoreGateway(Settings(qdrant_url=":memory:"), DIM)
+    rng = np.random.default_rng(0)
+    gateway.upsert_documents(make_docs(200, 1), rng.normal(size=(200, DIM)).tolist())
+
+    errors = []
+    done = threading.Event()
+
+    def writer():
+        try:
+            for i in range(30):
+                docs = make_docs(20, i % 5 + 1)
+                gateway.upsert_documents(docs, rng.normal(size=(20, DIM)).tolist())
+                gateway.delete_points([doc.id for doc in docs[:10]])
+        finally:
+            done.set()
+
+    def reader():
+        query = np.random.default_rng().normal(size=DIM).tolist()
+        while not done.is_set():
+            try:
+                gateway.search(query, 5, {"course_id": 2, "category": "Design"})
+                list(gateway.iter_points(filters={"course_id": 3}))
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"📊 Reader errors: {len(errors)}")
+    assert not errors, errors[:3]
+    assert gateway.count() == 200 + 30 * 10
+
+    print("✅ In-memory gateway is thread-safe!")
+    return True
+
+
+if __name__ == "__main__":
+    test_local_gateway_threads()